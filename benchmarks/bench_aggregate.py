@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""
+Validate a synthetic book where every word has an 'ocr_cinfo', which is
+reported as not checked in-depth, with and without aggregating the report,
+comparing items, size of the JSON lines report, time and peak memory.
+Exits with 1 if the aggregated counts differ from the full report.
+
+Usage: python -m benchmarks.bench_aggregate [--pages N]
+"""
+
+from __future__ import print_function
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from collections import Counter
+
+from hocr_spec import HocrValidator
+
+from .corpus import HocrCorpusGenerator
+
+
+def main():
+    parser = ArgumentParser(description="Aggregated reports")
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--samples', type=int, default=5)
+    args = parser.parse_args()
+
+    generator = HocrCorpusGenerator(pages=args.pages, cinfo=1.0,
+                                    error_rate=0.02)
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'book.hocr')
+    validator = HocrValidator('standard')
+    counts = []
+    try:
+        with open(path, 'w') as f:
+            for chunk in generator.generate():
+                f.write(chunk)
+        print("%-12s %8s %12s %10s %10s" % (
+            'report', 'items', 'jsonl [kB]', 'time [s]', 'peak [MB]'))
+        for aggregate in (None, args.samples):
+            tracemalloc.start()
+            t0 = time.time()
+            report = validator.validate(path, streaming=True,
+                                        aggregate=aggregate)
+            elapsed = time.time() - t0
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            out = io.StringIO()
+            report.write(out, 'jsonl')
+            counts.append(Counter())
+            for item in report.items:
+                counts[-1][item.level, item.rule] += getattr(item, 'count', 1)
+            print("%-12s %8d %12d %10.3f %10.1f" % (
+                'aggregated' if aggregate else 'full', len(report.items),
+                len(out.getvalue()) // 1024, elapsed, peak / 1024.0 / 1024))
+    finally:
+        shutil.rmtree(directory)
+    failures = counts[0] != counts[1]
+    print("%d failures" % failures)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
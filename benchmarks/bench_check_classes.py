@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Time HocrSpec.check_classes on synthetic documents, including building the
+structural index of a fresh context and on a context that is already
+indexed, and compare its single pass over the document with the former
+dispatch by one document-wide XPath per class.
+
+Usage: python -m benchmarks.bench_check_classes [--pages N ...]
+"""
+
+from __future__ import print_function
+
+import timeit
+from argparse import ArgumentParser
+
+from lxml import etree
+
+from hocr_spec import HocrSpec, HocrValidator
+
+from .corpus import HocrCorpusGenerator
+
+
+def legacy_walk(spec, root):
+    """
+    Element dispatch as done before: one document-wide XPath per class.
+    """
+    n = 0
+    for class_spec in spec.class_specs.values():
+        n += len(root.xpath('//*[@class="%s"]' % class_spec.name))
+    return n
+
+
+def check_classes(spec, root, context):
+    report = HocrValidator.Report(None)
+    spec.check_classes(report, root, context)
+    return report
+
+
+def main():
+    parser = ArgumentParser(description="Class checks")
+    parser.add_argument('--pages', type=int, nargs='+', default=[10, 100, 500])
+    args = parser.parse_args()
+
+    spec = HocrSpec('standard')
+    print("%8s %10s %12s %12s %12s %12s" % (
+        'pages', 'elements', 'xpath [s]', 'index [s]', 'cold [s]',
+        'indexed [s]'))
+    for pages in args.pages:
+        document = str(HocrCorpusGenerator(pages=pages, cinfo=0.1,
+                                           error_rate=0.01))
+        root = etree.fromstring(document.encode('utf-8'), etree.HTMLParser())
+        elements = sum(1 for _ in root.iter('*'))
+        legacy = min(timeit.repeat(lambda: legacy_walk(spec, root),
+                                   number=1, repeat=3))
+        index = min(timeit.repeat(lambda: spec.context(root).index,
+                                  number=1, repeat=3))
+        cold = min(timeit.repeat(
+            lambda: check_classes(spec, root, spec.context(root)),
+            number=1, repeat=3))
+        context = spec.context(root)
+        context.index
+        indexed = min(timeit.repeat(
+            lambda: check_classes(spec, root, context), number=1, repeat=3))
+        print("%8d %10d %12.4f %12.4f %12.4f %12.4f" % (
+            pages, elements, legacy, index, cold, indexed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+Compare queries over the properties of all elements of a synthetic
+document, word confidences out of range and the total area of word boxes,
+on per-element dicts vs. the columns of HocrSpec.extract_properties.
+
+Usage: python -m benchmarks.bench_columns [--pages N] [--cinfo FRACTION]
+"""
+
+from __future__ import print_function
+
+import timeit
+from argparse import ArgumentParser
+
+from lxml import etree
+
+from hocr_spec import HocrSpec
+
+from .corpus import HocrCorpusGenerator
+
+
+def dict_query(spec, elements, context):
+    low, high = spec.property_specs['x_wconf'].range
+    bad = []
+    area = 0
+    for el in elements:
+        props = context.properties(el)
+        conf = props.get('x_wconf')
+        if conf is not None and not low <= conf <= high:
+            bad.append(el)
+        if el.get('class') == 'ocrx_word' and 'bbox' in props:
+            x0, y0, x1, y1 = props['bbox']
+            area += (x1 - x0) * (y1 - y0)
+    return len(bad), area
+
+
+def column_query(spec, columns):
+    rows = columns['x_wconf'].out_of_range()[0]
+    bbox = columns['bbox']
+    word = ((columns.class_id == columns.classes.index('ocrx_word')) &
+            bbox.present)
+    b = bbox.values[word]
+    return len(rows), int(((b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])).sum())
+
+
+def main():
+    parser = ArgumentParser(description="Queries on property columns")
+    parser.add_argument('--pages', type=int, default=50)
+    parser.add_argument('--cinfo', type=float, default=0.2)
+    args = parser.parse_args()
+
+    spec = HocrSpec('standard')
+    document = str(HocrCorpusGenerator(pages=args.pages, cinfo=args.cinfo,
+                                       error_rate=0.01))
+    root = etree.fromstring(document.encode('utf-8'), etree.HTMLParser())
+    context = spec.context(root)
+    # Parse all titles once, both sides read the parsed properties
+    columns = spec.extract_properties(root, ['bbox', 'x_wconf'], context)
+    elements = columns.elements
+    assert dict_query(spec, elements, context) == column_query(spec, columns)
+    extract = min(timeit.repeat(lambda: spec.extract_properties(
+        root, ['bbox', 'x_wconf'], context), number=1, repeat=3))
+    dicts = min(timeit.repeat(lambda: dict_query(spec, elements, context),
+                              number=1, repeat=3))
+    vectorized = min(timeit.repeat(lambda: column_query(spec, columns),
+                                   number=1, repeat=3))
+    print("%d rows" % len(columns))
+    print("%-24s %10.4f s" % ('extract_properties', extract))
+    print("%-24s %10.4f s" % ('query on dicts', dicts))
+    print("%-24s %10.4f s  %.0fx" % ('query on columns', vectorized,
+                                     dicts / vectorized))
+
+
+if __name__ == '__main__':
+    main()
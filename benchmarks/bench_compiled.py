@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+Compare HocrSpec.check_classes with checkers compiled for the profile, see
+HocrClassCompiler, with the generic interpretation of the class specs, for
+several profiles, checking that both reports are the same. The document is
+parsed and indexed once, so only the checks of the elements are timed.
+Exits with 1 on any difference.
+
+Usage: python -m benchmarks.bench_compiled [--pages N]
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+from argparse import ArgumentParser
+
+from lxml import etree
+
+from hocr_spec import HocrSpec, HocrValidator
+from hocr_spec.compiler import HocrClassCompiler
+
+from .corpus import HocrCorpusGenerator
+
+CONFIGURATIONS = [
+    ('standard', {}),
+    ('standard', {'implicit_capabilities': ['ocr_line', 'ocr_page']}),
+    ('relaxed', {}),
+]
+
+
+def items(report):
+    return [(item.level, item.sourceline, item.rule, item.message)
+            for item in report.items]
+
+
+def check_classes(spec, root, context, compiled):
+    spec.compile_checks = compiled
+    report = HocrValidator.Report(None)
+    spec.check_classes(report, root, context)
+    return report
+
+
+def main():
+    parser = ArgumentParser(description="Compiled class checks")
+    parser.add_argument('--pages', type=int, default=50)
+    args = parser.parse_args()
+
+    failures = []
+    print("%-10s %-22s %-10s %8s %12s %12s %8s" % (
+        'profile', 'implicit', 'document', 'items', 'generic [s]',
+        'compiled [s]', 'speedup'))
+    for capabilities in (None, []):
+        generator = HocrCorpusGenerator(pages=args.pages, cinfo=0.1,
+                                        capabilities=capabilities,
+                                        error_rate=0.02)
+        root = etree.fromstring(str(generator).encode('utf-8'),
+                                etree.HTMLParser())
+        for profile, kwargs in CONFIGURATIONS:
+            spec = HocrSpec(profile, **kwargs)
+            context = spec.context(root)
+            context.index
+            generic = check_classes(spec, root, context, False)
+            compiled = check_classes(spec, root, context, True)
+            description = '%s %s %s' % (profile, kwargs, capabilities)
+            if items(compiled) != items(generic):
+                failures.append(description)
+            generic_time = min(timeit.repeat(
+                lambda: check_classes(spec, root, context, False),
+                number=1, repeat=7))
+            compiled_time = min(timeit.repeat(
+                lambda: check_classes(spec, root, context, True),
+                number=1, repeat=7))
+            print("%-10s %-22s %-10s %8d %12.4f %12.4f %7.1fx" % (
+                profile,
+                ','.join(kwargs.get('implicit_capabilities', [])) or '-',
+                'caps' if capabilities is None else 'no caps',
+                len(generic.items), generic_time, compiled_time,
+                generic_time / compiled_time))
+    spec = HocrSpec('standard', implicit_capabilities=['ocr_carea'])
+    compile_time = min(timeit.repeat(
+        lambda: HocrClassCompiler(spec).compile(), number=1, repeat=7))
+    print("compiling %d checkers: %.4f s" % (len(spec.class_specs),
+                                             compile_time))
+    print("%d failures %s" % (len(failures), failures))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+Compare the vectorized geometry checks of HocrBoxes with plain Python
+loops over elements and pairs of siblings on synthetic documents.
+
+Usage: python -m benchmarks.bench_geometry [--pages N] [--lines N]
+                                           [--words N ...]
+"""
+
+from __future__ import print_function
+
+import timeit
+from argparse import ArgumentParser
+
+from lxml import etree
+
+from hocr_spec import HocrSpec
+from hocr_spec.geometry import HocrBoxes
+
+from .corpus import HocrCorpusGenerator
+
+
+def python_checks(boxes, threshold):
+    """
+    The checks of HocrBoxes with loops over elements and sibling pairs.
+    """
+    b = boxes.boxes.tolist()
+    parents = boxes.parents.tolist()
+    classes = boxes.classes.tolist()
+    inverted = [i for i, (x0, y0, x1, y1) in enumerate(b)
+                if x0 > x1 or y0 > y1]
+    uncontained = []
+    siblings = {}
+    for i, (x0, y0, x1, y1) in enumerate(b):
+        p = parents[i]
+        if p < 0 or x0 > x1 or y0 > y1:
+            continue
+        px0, py0, px1, py1 = b[p]
+        if px0 <= px1 and py0 <= py1 and (
+                x0 < px0 or y0 < py0 or x1 > px1 or y1 > py1):
+            uncontained.append(i)
+        if x0 < x1 and y0 < y1:
+            siblings.setdefault((p, classes[i]), []).append(i)
+    overlaps = []
+    for group in siblings.values():
+        for n, i in enumerate(group):
+            x0, y0, x1, y1 = b[i]
+            for j in group[:n]:
+                u0, v0, u1, v1 = b[j]
+                w = min(x1, u1) - max(x0, u0)
+                h = min(y1, v1) - max(y0, v0)
+                if w > 0 and h > 0 and w * h > threshold * min(
+                        (x1 - x0) * (y1 - y0), (u1 - u0) * (v1 - v0)):
+                    overlaps.append(i)
+                    break
+    return inverted, uncontained, sorted(overlaps)
+
+
+def vectorized_checks(boxes, threshold):
+    return (boxes.inverted().tolist(), boxes.uncontained().tolist(),
+            boxes.sibling_overlaps(threshold)[0].tolist())
+
+
+def main():
+    parser = ArgumentParser(description="Vectorized geometry checks")
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--lines', type=int, default=50)
+    parser.add_argument('--words', type=int, nargs='+', default=[10, 100, 500],
+                        help="Words per line, one document per value")
+    args = parser.parse_args()
+
+    spec = HocrSpec('standard')
+    threshold = spec.overlap_threshold
+    print("%8s %10s %12s %12s %12s %8s" % (
+        'words', 'boxes', 'gather [s]', 'python [s]', 'numpy [s]', 'speedup'))
+    for words in args.words:
+        document = str(HocrCorpusGenerator(pages=args.pages, lines=args.lines,
+                                           words=words, error_rate=0.01))
+        root = etree.fromstring(document.encode('utf-8'), etree.HTMLParser())
+        context = spec.context(root)
+        boxes = HocrBoxes(root, context)
+        gather = min(timeit.repeat(lambda: HocrBoxes(root, context),
+                                   number=1, repeat=3))
+        assert python_checks(boxes, threshold) == \
+            vectorized_checks(boxes, threshold)
+        python = min(timeit.repeat(lambda: python_checks(boxes, threshold),
+                                   number=1, repeat=3))
+        vectorized = min(timeit.repeat(
+            lambda: vectorized_checks(boxes, threshold), number=1, repeat=3))
+        print("%8d %10d %12.4f %12.4f %12.4f %7.1fx" % (
+            args.pages * args.lines * words, len(boxes), gather, python, vectorized,
+            python / vectorized))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+Edit single pages of a synthetic book and re-validate it incrementally
+with a HocrPageCache vs. from scratch, checking that both reports are the
+same. Exits with 1 on any difference.
+
+Usage: python -m benchmarks.bench_incremental [--pages N]
+"""
+
+from __future__ import print_function
+
+import os
+import re
+import shutil
+import sys
+import tempfile
+import timeit
+from argparse import ArgumentParser
+
+from hocr_spec import HocrValidator
+from hocr_spec.incremental import HocrPageCache
+
+from .corpus import HocrCorpusGenerator
+
+
+def items(report):
+    return [(item.level, item.sourceline, item.rule, item.message)
+            for item in report.items]
+
+
+def edits(chunks, rnd_page):
+    """
+    Yield (description, chunks) of successive edits of the book.
+    """
+    page = rnd_page()
+    chunks[page] = re.sub(r'x_wconf \d+', 'x_wconf 101', chunks[page], 1)
+    yield 'word confidence out of range', chunks
+    page = rnd_page()
+    chunks[page] = chunks[page].replace(
+        '<span class="ocr_line"',
+        '<span class="ocr_line" title="bbox 100 90 200 150">'
+        '<span class="ocr_line"></span></span>\n<span class="ocr_line"', 1)
+    yield 'line inserted', chunks
+    page = rnd_page()
+    chunks[page] = chunks[page].replace('\n', '\n\n', 3)
+    yield 'lines moved', chunks
+    page = rnd_page()
+    del chunks[page]
+    yield 'page deleted', chunks
+    chunks[0] = chunks[0].replace(' ocr_cinfo"', '"')
+    yield 'capabilities changed', chunks
+
+
+def main():
+    parser = ArgumentParser(description="Incremental re-validation")
+    parser.add_argument('--pages', type=int, default=200)
+    args = parser.parse_args()
+
+    generator = HocrCorpusGenerator(pages=args.pages, cinfo=0.1,
+                                    error_rate=0.02)
+    chunks = list(generator.generate())
+    # Header and first page, so edits keep the head in chunks[0]
+    chunks[:2] = [chunks[0] + chunks[1]]
+    pages = iter(range(1, len(chunks) - 1, max(1, (len(chunks) - 2) // 5)))
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'book.hocr')
+    validator = HocrValidator('standard')
+    cache = HocrPageCache()
+    failures = []
+
+    def save(chunks):
+        with open(path, 'w') as f:
+            f.write(''.join(chunks))
+
+    try:
+        save(chunks)
+        validator.validate(path, incremental=cache)
+        print("%-28s %8s %8s %10s %10s" % (
+            'edit', 'checked', 'reused', 'full [s]', 'incr. [s]'))
+        for description, chunks in edits(chunks, lambda: next(pages)):
+            save(chunks)
+            # Start every measurement from the fragments of the last save
+            fragments = cache.fragments
+            full = validator.validate(path, streaming=True)
+            incremental = validator.validate(path, incremental=cache)
+            if items(incremental) != items(full) or sorted(
+                    items(incremental)) != sorted(items(
+                        validator.validate(path))):
+                failures.append(description)
+            checked, reused = cache.misses, cache.hits
+            full_time = min(timeit.repeat(
+                lambda: validator.validate(path, streaming=True),
+                number=1, repeat=3))
+
+            def incremental_run():
+                cache.fragments = fragments
+                validator.validate(path, incremental=cache)
+            incremental_time = min(timeit.repeat(incremental_run, number=1,
+                                                 repeat=3))
+            print("%-28s %8d %8d %10.3f %10.3f" % (
+                description, checked, reused, full_time, incremental_time))
+    finally:
+        shutil.rmtree(directory)
+    print("%d failures %s" % (len(failures), failures))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
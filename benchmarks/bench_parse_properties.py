@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark of 'title' property parsing on Tesseract-like titles:
+the former uncompiled parser vs. HocrPropertyParser without and with its
+fragment cache.
+
+Usage: python benchmarks/bench_parse_properties.py [NUMBER_OF_TITLES]
+"""
+
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from hocr_spec.parser import HocrPropertyParser  # noqa: E402
+from hocr_spec.spec import HocrSpecProperties  # noqa: E402
+
+
+def tesseract_titles(n, seed=42):
+    """
+    Mix of line and word titles as written by Tesseract: one line title
+    per ten words, word confidences and baselines from a small set.
+    """
+    rnd = random.Random(seed)
+    titles = []
+    while len(titles) < n:
+        x, y = rnd.randint(0, 2000), rnd.randint(0, 3000)
+        titles.append('bbox %d %d %d %d; baseline %s %d' % (
+            x, y, x + rnd.randint(500, 1500), y + rnd.randint(20, 60),
+            rnd.choice(['0', '0.001', '-0.002', '0.003']),
+            -rnd.randint(0, 12)))
+        for _ in range(10):
+            x += rnd.randint(20, 200)
+            titles.append('bbox %d %d %d %d; x_wconf %d' % (
+                x, y, x + rnd.randint(10, 150), y + rnd.randint(20, 60),
+                rnd.randint(60, 96)))
+    return titles[:n]
+
+
+def legacy_parse(title):
+    """
+    Title parsing as done before HocrPropertyParser.
+    """
+    ret = {}
+    for kv in re.split(r'\s*;\s*', title):
+        (k, v) = re.split(r'\s+', kv, 1)
+        prop_spec = getattr(HocrSpecProperties, k)
+        if prop_spec.list:
+            v = list(map(prop_spec.type,
+                         re.split(prop_spec.split_pattern[0], v)))
+        else:
+            v = prop_spec.type(v)
+        ret[k] = v
+    return ret
+
+
+def measure(label, parse, titles):
+    t0 = time.time()
+    for title in titles:
+        parse(title)
+    elapsed = time.time() - t0
+    print("%-28s %8.3f s %10.0f titles/s" % (
+        label, elapsed, len(titles) / elapsed))
+    return elapsed
+
+
+def main(n):
+    titles = tesseract_titles(n)
+    print("Parsing %d titles" % n)
+    uncached = HocrPropertyParser(HocrSpecProperties, cache_size=0)
+    cached = HocrPropertyParser(HocrSpecProperties, cache_size=4096)
+    for title in titles[:1000]:
+        assert legacy_parse(title) == uncached.parse(title) == \
+            cached.parse(title)
+    legacy = measure('legacy', legacy_parse, titles)
+    measure('compiled', uncached.parse, titles)
+    fast = measure('compiled + fragment cache', cached.parse, titles)
+    print("Speedup: %.1fx" % (legacy / fast))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3000000)
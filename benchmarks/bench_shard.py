@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Validate one synthetic book in page shards with a growing number of worker
+processes vs. streaming in a single process, checking that all reports are
+the same, also for a copy with an element of a class that merely starts with
+'ocr_page' between its pages. Exits with 1 on any difference.
+
+Usage: python -m benchmarks.bench_shard [--pages N] [--jobs N ...]
+"""
+
+from __future__ import print_function
+
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+from argparse import ArgumentParser
+
+from hocr_spec import HocrValidator
+
+from .corpus import HocrCorpusGenerator
+
+
+def items(report):
+    return [(item.level, item.sourceline, item.rule, item.message)
+            for item in report.items]
+
+
+def main():
+    parser = ArgumentParser(description="Sharded validation of one document")
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--jobs', type=int, nargs='+',
+                        default=sorted(set([2, multiprocessing.cpu_count()])))
+    args = parser.parse_args()
+
+    generator = HocrCorpusGenerator(pages=args.pages, cinfo=0.1,
+                                    error_rate=0.02)
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'book.hocr')
+    validator = HocrValidator('standard')
+    failures = []
+    try:
+        with open(path, 'w') as f:
+            for chunk in generator.generate():
+                f.write(chunk)
+        expected = items(validator.validate(path, streaming=True))
+        stream_time = min(timeit.repeat(
+            lambda: validator.validate(path, streaming=True),
+            number=1, repeat=3))
+        print("%-10s %10s %8s" % ('jobs', 'time [s]', 'speedup'))
+        print("%-10s %10.3f %8.2f" % ('stream', stream_time, 1))
+        for jobs in args.jobs:
+            if items(validator.validate(path, jobs=jobs)) != expected:
+                failures.append(jobs)
+            shard_time = min(timeit.repeat(
+                lambda: validator.validate(path, jobs=jobs),
+                number=1, repeat=3))
+            print("%-10d %10.3f %8.2f" % (jobs, shard_time,
+                                          stream_time / shard_time))
+        chunks = list(generator.generate())
+        middle = len(chunks) // 2
+        chunks.insert(middle, '<div class="ocr_page-x"><span class="ocr_line"'
+                      ' title="bbox 0 0 1 1"></span></div>\n')
+        with open(path, 'w') as f:
+            f.write(''.join(chunks))
+        expected = items(validator.validate(path, streaming=True))
+        for jobs in args.jobs:
+            if items(validator.validate(path, jobs=jobs)) != expected:
+                failures.append('%d, ocr_page-x' % jobs)
+    finally:
+        shutil.rmtree(directory)
+    print("%d failures %s" % (len(failures), failures))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+"""
+Startup time of hocr-spec: the time to import the CLI module as reported
+by `python -X importtime`, the modules costing most of it, and the wall
+time of `hocr-spec --help` and of validating a document whose report is
+cached. Exits with 1 if importing takes longer than `--budget`.
+
+hocr_spec is byte-compiled first, as it is when installed.
+
+Usage: python -m benchmarks.bench_startup [--repeat N] [--budget MS]
+"""
+
+from __future__ import print_function
+
+import compileall
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+from .corpus import HocrCorpusGenerator
+
+
+def import_times(module):
+    """
+    Self and cumulative import time in microseconds by module, of
+    importing `module` in a fresh interpreter.
+    """
+    err = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                          'import %s' % module],
+                         stderr=subprocess.PIPE, universal_newlines=True,
+                         check=True).stderr
+    times = {}
+    for line in err.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        us, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(us), int(cumulative))
+    return times
+
+
+def wall_time(args, repeat):
+    """
+    Minimum wall time in seconds of running the CLI with `args`.
+    """
+    times = []
+    for _ in range(repeat):
+        t0 = time.time()
+        subprocess.run([sys.executable, '-m', 'hocr_spec.cli'] + args,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.time() - t0)
+    return min(times)
+
+
+def main():
+    parser = ArgumentParser(description="Startup time")
+    parser.add_argument('--module', default='hocr_spec.cli')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10,
+                        help="Number of slowest modules to list")
+    parser.add_argument('--budget', type=float, metavar='MS',
+                        help="Maximum import time of --module")
+    args = parser.parse_args()
+
+    import hocr_spec
+    compileall.compile_dir(os.path.dirname(hocr_spec.__file__), quiet=1)
+    runs = [import_times(args.module) for _ in range(args.repeat)]
+    best = {}
+    for times in runs:
+        for name, t in times.items():
+            if not name in best or t[1] < best[name][1]:
+                best[name] = t
+    total = best[args.module][1] / 1000.0
+    print("import %s: %.1f ms (best of %d)" % (args.module, total,
+                                               args.repeat))
+    print("%-40s %10s %10s" % ('module', 'self [ms]', 'cum. [ms]'))
+    for name, (us, cumulative) in sorted(
+            best.items(), key=lambda item: -item[1][0])[:args.top]:
+        print("%-40s %10.1f %10.1f" % (name, us / 1000.0,
+                                       cumulative / 1000.0))
+
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'page.hocr')
+        with open(path, 'w') as f:
+            for chunk in HocrCorpusGenerator(pages=1).generate():
+                f.write(chunk)
+        cached = ['--cache-dir', os.path.join(directory, 'cache'), '-f',
+                  'bool', path]
+        wall_time(cached, 1)
+        print("%-40s %10.1f" % ('hocr-spec --help [ms]',
+                                wall_time(['--help'], args.repeat) * 1000))
+        print("%-40s %10.1f" % ('hocr-spec, cached report [ms]',
+                                wall_time(cached, args.repeat) * 1000))
+    finally:
+        shutil.rmtree(directory)
+    if args.budget is not None and total > args.budget:
+        print("Import time %.1f ms exceeds the budget of %.1f ms" % (
+            total, args.budget))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
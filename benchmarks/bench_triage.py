@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+Triage documents with every combination of missing, repeated and empty
+metadata fields and an unknown one, checking that HocrTriage.is_go agrees
+with whether check_metadata reports errors, and compare the time of triage
+with that of validation. Exits with 1 on any disagreement.
+
+Usage: python -m benchmarks.bench_triage [--pages N]
+"""
+
+from __future__ import print_function
+
+import io
+import itertools
+import sys
+import timeit
+from argparse import ArgumentParser
+
+from hocr_spec import HocrSpec, HocrValidator
+from hocr_spec.triage import HocrTriage
+
+from .corpus import HocrCorpusGenerator
+
+FIELDS = ['ocr-system', 'ocr-capabilities', 'ocr-number-of-pages',
+          'ocr-langs', 'ocr-scripts']
+STATES = ['present', 'missing', 'repeated', 'no content',
+          'repeated, first without content']
+
+
+def head(states, unknown):
+    """
+    The <head> of a document with the metadata fields in `states`.
+    """
+    metas = []
+    for name, state in zip(FIELDS, states):
+        meta = '<meta name="%s" content="1"/>\n' % name
+        if state == 'missing':
+            meta = ''
+        elif state == 'repeated':
+            meta *= 2
+        elif state == 'no content':
+            meta = '<meta name="%s"/>\n' % name
+        elif state == 'repeated, first without content':
+            meta = '<meta name="%s"/>\n' % name + meta
+        metas.append(meta)
+    if unknown:
+        metas.append('<meta name="ocr-unknown" content="1"/>\n')
+    return '<html>\n<head>\n%s</head>\n' % ''.join(metas)
+
+
+def main():
+    parser = ArgumentParser(description="Triage vs. metadata validation")
+    parser.add_argument('--pages', type=int, default=50)
+    args = parser.parse_args()
+
+    checks = [check for check in HocrSpec.checks if check != 'metadata']
+    validator = HocrValidator('standard', skip_check=checks)
+    spec = HocrSpec('standard')
+    failures = []
+    n = 0
+    for states in itertools.product(STATES, repeat=len(FIELDS)):
+        for unknown in (False, True):
+            document = (head(states, unknown) + '<body></body>\n</html>\n')
+            document = document.encode('utf-8')
+            report = validator.validate(io.BytesIO(document))
+            triage = HocrTriage(io.BytesIO(document), spec)
+            n += 1
+            if triage.is_go() != report.is_valid():
+                failures.append((states, unknown))
+
+    document = str(HocrCorpusGenerator(pages=args.pages)).encode('utf-8')
+    full = HocrValidator('standard')
+    validate_time = min(timeit.repeat(
+        lambda: full.validate(io.BytesIO(document)), number=1, repeat=3))
+    triage_time = min(timeit.repeat(
+        lambda: HocrTriage(io.BytesIO(document), spec), number=1, repeat=3))
+    print("%-10s %10s %10s %8s" % ('pages', 'validate', 'triage', 'speedup'))
+    print("%-10d %10.4f %10.4f %7.0fx" % (args.pages, validate_time,
+                                          triage_time,
+                                          validate_time / triage_time))
+    print("%d of %d metadata combinations disagree %s" % (
+        len(failures), n, failures[:5]))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+"""
+Deterministic generator of synthetic hOCR documents.
+
+Usage: python -m benchmarks.corpus [--pages N] [--lines N] ... > out.hocr
+"""
+
+from __future__ import print_function
+
+import random
+import sys
+from argparse import ArgumentParser
+
+DEFAULT_CAPABILITIES = [
+    'ocr_page', 'ocr_carea', 'ocr_par', 'ocr_line', 'ocrx_word', 'ocr_cinfo']
+
+# Errors that can be injected, see HocrCorpusGenerator
+ERRORS = ['wconf_range', 'line_without_bbox', 'nested_line', 'bad_tagname',
+          'empty_lang', 'unknown_property']
+
+
+class HocrCorpusGenerator(object):
+    """
+    Generates synthetic hOCR documents shaped like Tesseract output.
+
+    The same arguments always produce the same document.
+
+    Args:
+        pages (int): Number of ocr_page elements
+        lines (int): Number of ocr_line elements per page
+        words (int): Number of ocrx_word elements per line
+        cinfo (float): Fraction of words with an ocr_cinfo element carrying
+            'cuts' and 'x_confs'
+        capabilities (List[str]): Content of the ocr-capabilities metadata
+        error_rate (float): Probability per line of injecting one of ERRORS
+        seed (int): Seed of the random number generator
+    """
+
+    def __init__(self, pages=10, lines=30, words=10, cinfo=0.0,
+                 capabilities=None, error_rate=0.0, seed=0):
+        self.pages = pages
+        self.lines = lines
+        self.words = words
+        self.cinfo = cinfo
+        self.capabilities = DEFAULT_CAPABILITIES if capabilities is None \
+            else capabilities
+        self.error_rate = error_rate
+        self.seed = seed
+
+    def params(self):
+        """
+        Parameters of the generator, e.g. to record them with results.
+        """
+        return {
+            'pages': self.pages,
+            'lines': self.lines,
+            'words': self.words,
+            'cinfo': self.cinfo,
+            'capabilities': self.capabilities,
+            'error_rate': self.error_rate,
+            'seed': self.seed,
+        }
+
+    def generate(self):
+        """
+        Yield the document in chunks of text.
+        """
+        rnd = random.Random(self.seed)
+        yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+               '<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN"'
+               ' "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">\n'
+               '<html xmlns="http://www.w3.org/1999/xhtml" lang="en">\n'
+               '<head>\n<title></title>\n'
+               '<meta name="ocr-system" content="tesseract 3.03"/>\n'
+               '<meta name="ocr-capabilities" content="%s"/>\n'
+               '<meta name="ocr-number-of-pages" content="%d"/>\n'
+               '<meta name="ocr-langs" content="eng"/>\n'
+               '<meta name="ocr-scripts" content="Latn"/>\n'
+               '</head>\n<body>\n' % (' '.join(self.capabilities), self.pages))
+        for page in range(self.pages):
+            yield ''.join(self.__page(rnd, page))
+        yield '</body>\n</html>\n'
+
+    def write(self, fp):
+        for chunk in self.generate():
+            fp.write(chunk)
+
+    def __str__(self):
+        return ''.join(self.generate())
+
+    def __page(self, rnd, page):
+        # A4 at 300 dpi, grown to fit the lines and words
+        page_width = max(2480, 260 + self.words * 220)
+        page_height = max(3508, 200 + self.lines * 100)
+        yield ('<div class="ocr_page" id="page_%d" title="image page_%d.png; '
+               'bbox 0 0 %d %d; ppageno %d">\n' % (
+                   page, page, page_width, page_height, page))
+        yield ('<div class="ocr_carea" id="block_%d" title="bbox 100 100 %d '
+               '%d">\n<p class="ocr_par" id="par_%d" title="bbox 100 100 '
+               '%d %d">\n' % (page, page_width - 100, page_height - 108, page,
+                              page_width - 100, page_height - 108))
+        for line in range(self.lines):
+            error = None
+            if self.error_rate and rnd.random() < self.error_rate:
+                error = rnd.choice(ERRORS)
+            y = 100 + line * 100
+            line_title = 'bbox 100 %d %d %d; baseline 0.001 -9' % (
+                y, page_width - 100, y + 60)
+            if error == 'line_without_bbox':
+                line_title = 'baseline 0.001 -9'
+            elif error == 'unknown_property':
+                line_title += '; x_size 37'
+            yield '<span class="ocr_line" id="line_%d_%d" title="%s">\n' % (
+                page, line, line_title)
+            x = 100
+            for word in range(self.words):
+                width = rnd.randint(40, 200)
+                wconf = rnd.randint(60, 96)
+                if error == 'wconf_range' and word == 0:
+                    wconf = 120
+                attrs = ''
+                if error == 'empty_lang' and word == 0:
+                    attrs = ' lang=""'
+                yield ('<span class="ocrx_word" id="word_%d_%d_%d"%s title="bbox '
+                       '%d %d %d %d; x_wconf %d">w%d</span>' % (
+                           page, line, word, attrs, x, y, x + width, y + 60,
+                           wconf, word))
+                if self.cinfo and rnd.random() < self.cinfo:
+                    cuts = ' '.join('%d,%d' % (i * 10, rnd.randint(0, 5))
+                                    for i in range(1, 4))
+                    yield ('<span class="ocr_cinfo" title="bbox %d %d %d %d; '
+                           'cuts %s; x_confs %s"></span>' % (
+                               x, y, x + width, y + 60, cuts,
+                               ' '.join(str(rnd.randint(50, 99))
+                                        for _ in range(4))))
+                yield '\n'
+                x += width + 20
+            if error == 'nested_line':
+                yield ('<span class="ocr_line" title="bbox 100 %d 200 %d">'
+                       '</span>\n' % (y, y + 60))
+            yield '</span>\n'
+            if error == 'bad_tagname':
+                yield '<span class="ocr_chapter">chapter</span>\n'
+        yield '</p>\n</div>\n</div>\n'
+
+
+def add_arguments(parser):
+    """
+    Add the generator parameters to an ArgumentParser.
+    """
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--lines', type=int, default=30,
+                        help="Lines per page")
+    parser.add_argument('--words', type=int, default=10,
+                        help="Words per line")
+    parser.add_argument('--cinfo', type=float, default=0.0,
+                        help="Fraction of words with character information")
+    parser.add_argument('--capabilities', nargs='*',
+                        default=DEFAULT_CAPABILITIES)
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help="Probability of an error per line")
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def from_arguments(args):
+    return HocrCorpusGenerator(pages=args.pages,
+                               lines=args.lines,
+                               words=args.words,
+                               cinfo=args.cinfo,
+                               capabilities=args.capabilities,
+                               error_rate=args.error_rate,
+                               seed=args.seed)
+
+
+def main():
+    parser = ArgumentParser(description="Generate a synthetic hOCR document")
+    add_arguments(parser)
+    from_arguments(parser.parse_args()).write(sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+"""
+Benchmark runner: times HocrValidator.validate end to end, every check in
+HocrSpec.checks and HocrSpec.optional_checks and HocrSpec.parse_properties
+on a synthetic document and writes the results as JSON.
+
+Usage:
+    python -m benchmarks.run [--pages N] ... [--output results.json]
+    python -m benchmarks.run --compare before.json after.json
+"""
+
+from __future__ import print_function
+
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from lxml import etree
+
+from hocr_spec import HocrSpec, HocrValidator
+
+from . import corpus
+
+
+def peak_rss_kb():
+    """
+    Peak resident set size of this process in KiB or None if unknown.
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KiB elsewhere
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def best_of(repeat, fn):
+    """
+    Minimum wall time in seconds of `repeat` calls of fn.
+    """
+    times = []
+    for _ in range(repeat):
+        t0 = time.time()
+        fn()
+        times.append(time.time() - t0)
+    return min(times)
+
+
+def _validate_in_child(args):
+    path, profile, repeat, streaming = args
+    validator = HocrValidator(profile)
+    result = {}
+    result['seconds'] = best_of(repeat, lambda: validator.validate(
+        path, streaming=streaming))
+    result['peak_rss_kb'] = peak_rss_kb()
+    result['items'] = len(validator.validate(path, streaming=streaming).items)
+    return result
+
+
+def time_validate(path, profile, repeat, streaming=False):
+    """
+    Time validate in a fresh process so its peak memory can be measured.
+    """
+    pool = multiprocessing.Pool(1)
+    try:
+        return pool.apply(_validate_in_child,
+                          ((path, profile, repeat, streaming),))
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def time_checks(path, profile, repeat):
+    """
+    Time every check on its own, each with a fresh document context.
+    """
+    spec = HocrSpec(profile)
+    root = etree.parse(path, etree.HTMLParser()).getroot()
+    results = {}
+    for check in HocrSpec.checks + HocrSpec.optional_checks:
+        fn = getattr(spec, 'check_%s' % check)
+
+        def run():
+            fn(HocrValidator.Report(path), root, spec.context(root))
+        results['check_%s' % check] = {'seconds': best_of(repeat, run)}
+    return results
+
+
+def time_parse_properties(path, profile, repeat):
+    """
+    Time parse_properties on all titles of the document.
+    """
+    spec = HocrSpec(profile)
+    root = etree.parse(path, etree.HTMLParser()).getroot()
+    titles = root.xpath('//*[starts-with(@class, "ocr")]/@title')
+
+    def run():
+        for title in titles:
+            try:
+                spec.parse_properties(title)
+            except Exception:
+                pass
+    return {'seconds': best_of(repeat, run), 'titles': len(titles)}
+
+
+def environment():
+    env = {
+        'python': platform.python_version(),
+        'lxml': '.'.join(map(str, etree.LXML_VERSION)),
+        'platform': platform.platform(),
+        'cpus': multiprocessing.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    try:
+        env['git'] = subprocess.check_output(
+            ['git', 'describe', '--always', '--dirty'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.STDOUT).decode('utf-8').strip()
+    except Exception:
+        env['git'] = None
+    return env
+
+
+def run(generator, profile='standard', repeat=3):
+    """
+    Run all benchmarks on the document of `generator`.
+    """
+    fd, path = tempfile.mkstemp(suffix='.hocr')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            generator.write(f)
+        results = {
+            'validate': time_validate(path, profile, repeat),
+            'validate_streaming': time_validate(path, profile, repeat,
+                                                streaming=True),
+            'parse_properties': time_parse_properties(path, profile, repeat),
+        }
+        results.update(time_checks(path, profile, repeat))
+        root = etree.parse(path, etree.HTMLParser()).getroot()
+        document = generator.params()
+        document['bytes'] = os.path.getsize(path)
+        document['elements'] = sum(1 for _ in root.iter('*'))
+    finally:
+        os.unlink(path)
+    return {
+        'environment': environment(),
+        'profile': profile,
+        'repeat': repeat,
+        'document': document,
+        'results': results,
+    }
+
+
+def compare(before, after):
+    """
+    Print the results of two runs side by side.
+    """
+    print("%-22s %12s %12s %8s" % ('benchmark', 'before [s]', 'after [s]',
+                                   'ratio'))
+    for name in sorted(set(before['results']) | set(after['results'])):
+        a = before['results'].get(name, {}).get('seconds')
+        b = after['results'].get(name, {}).get('seconds')
+        ratio = '%7.2fx' % (a / b) if a and b else '-'
+        print("%-22s %12s %12s %8s" % (
+            name,
+            '%.4f' % a if a is not None else '-',
+            '%.4f' % b if b is not None else '-',
+            ratio))
+
+
+def main():
+    parser = ArgumentParser(description="Benchmark hocr-spec")
+    corpus.add_arguments(parser)
+    parser.add_argument('--profile', default='standard',
+                        choices=HocrSpec.list('profiles'))
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="Report the best of this many runs")
+    parser.add_argument('--output', '-o',
+                        help="Write results to this file instead of STDOUT")
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'),
+                        help="Compare two result files instead of running")
+    args = parser.parse_args()
+    if args.compare:
+        with open(args.compare[0]) as a, open(args.compare[1]) as b:
+            compare(json.load(a), json.load(b))
+        return
+    results = run(corpus.from_arguments(args), args.profile, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    else:
+        json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+
+if __name__ == '__main__':
+    main()
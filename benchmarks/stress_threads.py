@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+Concurrency stress check: validates synthetic documents with differently
+configured validators from many threads at once and compares every report
+with the one from validating sequentially. Exits with 1 on any difference.
+
+Usage: python -m benchmarks.stress_threads [--threads N] [--rounds N]
+"""
+
+from __future__ import print_function
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+from argparse import ArgumentParser
+
+from hocr_spec import HocrSpec, HocrValidator
+
+from .corpus import HocrCorpusGenerator
+
+CONFIGS = [
+    ('standard', {}),
+    ('relaxed', {}),
+    ('standard', {'skip_check': ['classes']}),
+    ('standard', {'implicit_capabilities': ['*']}),
+    ('standard', {'skip_check': ['metadata', 'attributes']}),
+    ('standard', {'add_check': ['geometry']}),
+]
+
+
+def items(report):
+    return [(item.level, item.sourceline, item.rule, item.message)
+            for item in report.items]
+
+
+def profile_state():
+    return dict((name, (profile.version, list(profile.implicit_capabilities),
+                        list(profile.skip_check), list(profile.add_check)))
+                for name, profile in HocrSpec.profiles.items())
+
+
+def write_documents(directory, n):
+    paths = []
+    for seed in range(n):
+        generator = HocrCorpusGenerator(
+            pages=2 + seed % 3, lines=10, words=6, cinfo=0.2,
+            capabilities=['ocr_page', 'ocr_line'] if seed % 2 else None,
+            error_rate=0.2, seed=seed)
+        path = os.path.join(directory, 'doc%d.hocr' % seed)
+        with open(path, 'w') as f:
+            generator.write(f)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = ArgumentParser(description="Validate from many threads at once")
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=20,
+                        help="Validations per thread")
+    parser.add_argument('--documents', type=int, default=6)
+    args = parser.parse_args()
+
+    profiles_before = profile_state()
+    directory = tempfile.mkdtemp()
+    try:
+        paths = write_documents(directory, args.documents)
+        expected = {}
+        for c, (profile, kwargs) in enumerate(CONFIGS):
+            validator = HocrValidator(profile, **kwargs)
+            for path in paths:
+                for streaming in (False, True):
+                    expected[c, path, streaming] = items(validator.validate(
+                        path, streaming=streaming))
+        shared = [HocrValidator(profile, **kwargs)
+                  for profile, kwargs in CONFIGS]
+        failures = []
+        lock = threading.Lock()
+
+        def worker(n):
+            rnd = random.Random(n)
+            for i in range(args.rounds):
+                c = rnd.randrange(len(CONFIGS))
+                path = rnd.choice(paths)
+                streaming = rnd.random() < 0.3
+                # Half of the time, build a validator in this thread while
+                # others are validating
+                if rnd.random() < 0.5:
+                    profile, kwargs = CONFIGS[c]
+                    validator = HocrValidator(profile, **kwargs)
+                else:
+                    validator = shared[c]
+                filename = '%s#%d.%d' % (path, n, i)
+                report = validator.validate(path, filename=filename,
+                                            streaming=streaming)
+                if report.filename != filename or \
+                        items(report) != expected[c, path, streaming]:
+                    with lock:
+                        failures.append((n, i, CONFIGS[c], path, streaming))
+
+        threads = [threading.Thread(target=worker, args=(n,))
+                   for n in range(args.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # The batch API must keep the order of the sources
+        for c, validator in enumerate(shared):
+            batch = list(validator.validate_many(paths * 3, threads=4))
+            for path, report in zip(paths * 3, batch):
+                if items(report) != expected[c, path, False]:
+                    failures.append(('validate_many', CONFIGS[c], path))
+    finally:
+        shutil.rmtree(directory)
+
+    if profile_state() != profiles_before:
+        failures.append(('profiles modified', profile_state()))
+    total = args.threads * args.rounds
+    print("%d validations in %d threads, %d failures" % (
+        total, args.threads, len(failures)))
+    for failure in failures[:10]:
+        print("  %s" % (failure,))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,5 +3,24 @@
 Classes for validating and parsing hOCR, close to the spec.
 """
 
-from .spec import HocrSpec
-from .validate import HocrValidator
+import sys
+
+__all__ = ['HocrSpec', 'HocrValidator']
+
+if sys.version_info >= (3, 7):
+    # Imported on first use, so importing a submodule like hocr_spec.triage
+    # doesn't import the validator
+    def __getattr__(name):
+        if name == 'HocrSpec':
+            from .spec import HocrSpec
+            return HocrSpec
+        if name == 'HocrValidator':
+            from .validate import HocrValidator
+            return HocrValidator
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+    def __dir__():
+        return sorted(list(globals()) + __all__)
+else:
+    from .spec import HocrSpec
+    from .validate import HocrValidator
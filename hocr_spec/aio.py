@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+asyncio interface to HocrValidator.
+
+Requires Python 3.6 or newer.
+"""
+
+from builtins import object
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from .validate import HocrValidator
+
+_END = object()
+
+# The loop of the running coroutine, get_event_loop is deprecated there
+# but get_running_loop is new in Python 3.7
+_running_loop = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)
+
+
+class HocrAsyncValidator(object):
+    """
+    Validate documents without blocking the event loop.
+
+    Reading, parsing and checking run in an executor. lxml releases the GIL
+    while parsing, so threads validate in parallel to some extent.
+
+    Args:
+        profile (str): Validation profile
+        executor (Optional[concurrent.futures.Executor]): Where to validate.
+            Default: A thread pool per call of `validate_many` and the
+            default executor of the loop for `validate`
+        **kwargs: Passed on to HocrValidator
+    """
+
+    def __init__(self, profile='standard', executor=None, **kwargs):
+        self.validator = HocrValidator(profile, **kwargs)
+        self.executor = executor
+
+    async def validate(self, source, **kwargs):
+        """
+        Validate a single document.
+
+        Args:
+            source (str): A filename or a binary file object
+            **kwargs: Passed on to HocrValidator.validate
+
+        Returns:
+            HocrValidator.Report
+        """
+        loop = _running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(
+            self.validator.validate, source, **kwargs))
+
+    async def validate_many(self, sources, concurrency=4,
+                            return_exceptions=False, **kwargs):
+        """
+        Validate documents with at most `concurrency` of them in flight.
+
+        The next source is only taken from `sources` when a validation has
+        finished, so a producer of sources is slowed down to the pace of
+        validation.
+
+        Args:
+            sources (Iterable|AsyncIterable): Filenames or binary file objects
+            concurrency (int): Maximum number of documents validated at once
+            return_exceptions (bool): Whether to yield the exception of a
+                failed validation instead of raising it. Otherwise it is
+                raised once the reports of the other validations that
+                finished with it are yielded. Default: False
+            **kwargs: Passed on to HocrValidator.validate
+
+        Returns:
+            Async iterator over the reports, in the order they complete
+        """
+        loop = _running_loop()
+        executor = self.executor
+        own_executor = executor is None
+        if own_executor:
+            executor = ThreadPoolExecutor(max_workers=concurrency)
+        if hasattr(sources, '__aiter__'):
+            iterator = sources.__aiter__()
+
+            async def take():
+                try:
+                    return await iterator.__anext__()
+                except StopAsyncIteration:
+                    return _END
+        else:
+            iterator = iter(sources)
+
+            async def take():
+                return next(iterator, _END)
+        pending = set()
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < concurrency:
+                    source = await take()
+                    if source is _END:
+                        exhausted = True
+                        break
+                    pending.add(loop.run_in_executor(
+                        executor, functools.partial(
+                            self.validator.validate, source, **kwargs)))
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                failed = None
+                for future in done:
+                    error = future.exception()
+                    if error is None:
+                        yield future.result()
+                    elif return_exceptions:
+                        yield error
+                    elif failed is None:
+                        failed = error
+                if failed is not None:
+                    raise failed
+        finally:
+            for future in pending:
+                future.cancel()
+            if own_executor:
+                executor.shutdown(wait=False)
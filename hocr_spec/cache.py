@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+
+from builtins import object
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .validate import HocrValidator
+
+
+def spec_version():
+    """
+    Version of hocr_spec as a fingerprint of its source files, so that any
+    change, including installing another release, invalidates cached
+    results.
+
+    The release isn't looked up in the package metadata, importing
+    importlib.metadata takes longer than answering from the cache.
+    """
+    package = os.path.dirname(os.path.abspath(__file__))
+    fingerprint = hashlib.sha1()
+    for name in sorted(os.listdir(package)):
+        if name.endswith('.py'):
+            st = os.stat(os.path.join(package, name))
+            fingerprint.update(('%s %d %d\n' % (
+                name, st.st_size, st.st_mtime)).encode('utf-8'))
+    return fingerprint.hexdigest()[:12]
+
+
+class HocrResultCache(object):
+    """
+    Content-addressed cache of validation reports in a SQLite database.
+
+    Reports are keyed on the SHA-256 of the document and everything that
+    influences the result: spec class, profile version, enabled checks,
+    implicit capabilities, options of the spec, parser strictness,
+    streaming, aggregation and the version of hocr_spec. Digests are
+    remembered per path, size and mtime, so unchanged files are not even
+    read on a cache hit.
+
+    Entries older than `max_age` seconds are evicted, then the least
+    recently used entries until the stored reports fit into `max_size`
+    bytes, and with them the digests no report is stored for any more.
+    Eviction runs when the cache is created. The cache can be used
+    by several threads and sent to other processes, each of them opens its
+    own connection.
+
+    Args:
+        directory (str): Directory of the database, created if missing
+        max_age (Optional[float]): Maximum age of entries in seconds
+        max_size (Optional[int]): Maximum total size of stored reports in bytes
+    """
+
+    filename = 'results.sqlite'
+    chunk_size = 1 << 20
+
+    def __init__(self, directory, max_age=None, max_size=None):
+        self.directory = directory
+        self.max_age = max_age
+        self.max_size = max_size
+        self.version = spec_version()
+        self.__local = threading.local()
+        self.evict()
+
+    def __getstate__(self):
+        # Every process and thread opens its own connection
+        state = self.__dict__.copy()
+        del state['_HocrResultCache__local']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__local = threading.local()
+
+    @property
+    def db(self):
+        db = getattr(self.__local, 'db', None)
+        if db is None:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            db = sqlite3.connect(os.path.join(self.directory, self.filename),
+                                 timeout=60)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('CREATE TABLE IF NOT EXISTS results ('
+                       'key TEXT PRIMARY KEY, report TEXT, size INTEGER, '
+                       'created REAL, accessed REAL)')
+            db.execute('CREATE TABLE IF NOT EXISTS digests ('
+                       'path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, '
+                       'digest TEXT)')
+            db.commit()
+            self.__local.db = db
+        return db
+
+    def digest(self, path):
+        """
+        SHA-256 of the file at `path`, reusing the digest from the last time
+        if size and mtime did not change.
+        """
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        mtime = int(st.st_mtime * 1e9)
+        row = self.db.execute('SELECT digest FROM digests '
+                              'WHERE path=? AND size=? AND mtime=?',
+                              (path, st.st_size, mtime)).fetchone()
+        if row:
+            return row[0]
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        self.db.execute('INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?)',
+                        (path, st.st_size, mtime, digest))
+        self.db.commit()
+        return digest
+
+    def key(self, path, spec, parse_strict=False, streaming=False,
+            aggregate=None):
+        """
+        Cache key of validating `path` against `spec`.
+
+        Streaming is part of the key since it reports in a different order,
+        aggregation since it reports groups of items. The key starts with
+        the digest of the document, see evict.
+        """
+        digest = self.digest(path)
+        config = json.dumps([
+            digest,
+            '%s.%s' % (spec.__class__.__module__, spec.__class__.__name__),
+            spec.profile.version,
+            sorted(spec.checks),
+            sorted(spec.profile.implicit_capabilities),
+            spec.overlap_threshold,
+            bool(spec.compile_checks),
+            bool(parse_strict),
+            bool(streaming),
+            aggregate,
+            self.version,
+        ])
+        return '%s-%s' % (digest,
+                          hashlib.sha256(config.encode('utf-8')).hexdigest())
+
+    def get(self, key, report):
+        """
+        Fill `report` with the cached items for `key`.
+
+        Returns:
+            Whether `key` was found.
+        """
+        row = self.db.execute('SELECT report FROM results WHERE key=?',
+                              (key,)).fetchone()
+        if not row:
+            return False
+        for values in json.loads(row[0]):
+            level, sourceline, rule, message = values[:4]
+            if len(values) > 4:
+                # A ReportGroup, see put
+                item = HocrValidator.ReportGroup(level, sourceline, message,
+                                                 rule=rule)
+                (item.count, item.sourcelines, item.min_sourceline,
+                 item.max_sourceline) = values[4:]
+            else:
+                item = HocrValidator.ReportItem(level, sourceline, message,
+                                                rule=rule)
+            report.items.append(item)
+        self.db.execute('UPDATE results SET accessed=? WHERE key=?',
+                        (time.time(), key))
+        self.db.commit()
+        return True
+
+    def put(self, key, report):
+        """
+        Store the items of `report` for `key`.
+        """
+        data = json.dumps([[item.level, item.sourceline, item.rule,
+                            item.message] + (
+                                [item.count, item.sourcelines,
+                                 item.min_sourceline, item.max_sourceline]
+                                if isinstance(item, HocrValidator.ReportGroup)
+                                else []) for item in report.items])
+        now = time.time()
+        self.db.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)',
+                        (key, data, len(data), now, now))
+        self.db.commit()
+
+    def evict(self):
+        """
+        Remove entries exceeding `max_age` and `max_size`.
+        """
+        if self.max_age is not None:
+            self.db.execute('DELETE FROM results WHERE created < ?',
+                            (time.time() - self.max_age,))
+        if self.max_size is not None:
+            total = self.db.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+            if total > self.max_size:
+                rows = self.db.execute(
+                    'SELECT key, size FROM results ORDER BY accessed').fetchall()
+                evicted = []
+                for key, size in rows:
+                    if total <= self.max_size:
+                        break
+                    evicted.append((key,))
+                    total -= size
+                self.db.executemany('DELETE FROM results WHERE key=?', evicted)
+        if self.max_age is not None or self.max_size is not None:
+            # Digests of documents without any stored report
+            self.db.execute('DELETE FROM digests WHERE digest NOT IN '
+                            '(SELECT substr(key, 1, 64) FROM results)')
+        self.db.commit()
+
+    def close(self):
+        """
+        Close the connection of the calling thread.
+        """
+        db = getattr(self.__local, 'db', None)
+        if db is not None:
+            db.close()
+            self.__local.db = None
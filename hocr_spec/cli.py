@@ -1,49 +1,150 @@
 #!/usr/bin/env python
 
 import sys
-from hocr_spec import HocrValidator, HocrSpec
+from hocr_spec.spec import HocrSpec
+from hocr_spec.validate import HocrValidator
+from hocr_spec.sources import INCLUDE, iter_sources
 from argparse import ArgumentParser
 
+
+def add_validation_arguments(parser):
+    """
+    Add the arguments selecting the documents and how they are validated to
+    `parser`, shared by `hocr-spec` and `hocr-spec client`.
+    """
+    parser.add_argument(
+        'sources',
+        nargs='+',
+        help="hOCR file, directory or zip/tar archive to check or '-' to "
+             "read from STDIN")
+    parser.add_argument(
+        '--aggregate',
+        action='store_true',
+        help="Report every kind of issue once, with the number of "
+             "occurrences, the range of their lines and the first lines, "
+             "see --aggregate-lines")
+    parser.add_argument(
+        '--aggregate-lines',
+        type=int,
+        default=5,
+        metavar='N',
+        help="Number of lines to report of every kind of issue with "
+             "--aggregate (default: 5)")
+    parser.add_argument(
+        '--filename',
+        help="Filename to use in report")
+    parser.add_argument(
+        '--profile',
+        '-p',
+        default='standard',
+        choices=HocrSpec.list('profiles'),
+        help="Validation profile")
+    parser.add_argument(
+        '--implicit_capabilities',
+        '-C',
+        action='append',
+        metavar='CAPABILITY',
+        choices=HocrSpec.list('capabilities'),
+        help="Enable this capability. Use '*' to enable all capabilities. "
+             "In addition to the 'ocr*' classes, you can use %s" %
+             HocrSpec.list('capabilities')
+        )
+    parser.add_argument(
+        '--skip-check',
+        '-X',
+        action='append',
+        choices=HocrSpec.checks,
+        help="Skip one check")
+    parser.add_argument(
+        '--add-check',
+        '-A',
+        action='append',
+        choices=HocrSpec.optional_checks,
+        help="Run one optional check as well. geometry requires NumPy")
+    parser.add_argument(
+        '--parse-strict',
+        action='store_true',
+        help="Parse HTML with less tolerance for errors")
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help="Check the document page by page while parsing it, "
+             "to bound memory usage by the largest page")
+    parser.add_argument(
+        '--include',
+        '-i',
+        action='append',
+        metavar='GLOB',
+        help="Check the files in directories and archives matching this "
+             "pattern. Default: %s" % ' '.join(INCLUDE))
+
+
 parser = ArgumentParser()
-parser.add_argument(
-    'sources',
-    nargs='+',
-    help="hOCR file to check or '-' to read from STDIN")
 parser.add_argument(
     '--format',
     '-f',
     choices=HocrValidator.formats,
     default=HocrValidator.formats[0],
-    help="Report format")
+    help="Report format. jsonl writes the issues of documents validated "
+         "one after another as they are found, page by page")
+add_validation_arguments(parser)
+parser.add_argument(
+    '--jobs',
+    '-j',
+    type=int,
+    metavar='N',
+    help="Number of documents to validate in parallel. Default: Number of CPUs. "
+         "A single document is split at its pages and checked in N "
+         "processes if N is given")
+parser.add_argument(
+    '--chunksize',
+    type=int,
+    default=1,
+    metavar='N',
+    help="Number of documents to send to a parallel job at once. "
+         "Increase for many small documents. Default: 1")
 parser.add_argument(
-    '--filename',
-    help="Filename to use in report")
+    '--fail-fast',
+    action='store_true',
+    help="Stop validating a document at its first error. Implies --stream, "
+         "so a single document is not split with --jobs")
+parser.add_argument(
+    '--max-errors',
+    type=int,
+    metavar='N',
+    help="Stop validating a document at N errors. Implies --stream, so a "
+         "single document is not split with --jobs")
+parser.add_argument(
+    '--timeout',
+    type=float,
+    metavar='SECONDS',
+    help="Stop validating a document after this many seconds and report "
+         "an error. Implies --stream, so a single document is not split "
+         "with --jobs")
 parser.add_argument(
-    '--profile',
-    '-p',
-    default='standard',
-    choices=HocrSpec.list('profiles'),
-    help="Validation profile")
+    '--cache-dir',
+    metavar='DIR',
+    help="Reuse the reports of unchanged documents from earlier runs, "
+         "stored in this directory")
 parser.add_argument(
-    '--implicit_capabilities',
-    '-C',
-    action='append',
-    metavar='CAPABILITY',
-    choices=HocrSpec.list('capabilities'),
-    help="Enable this capability. Use '*' to enable all capabilities. "
-         "In addition to the 'ocr*' classes, you can use %s" %
-         HocrSpec.list('capabilities')
-    )
+    '--cache-max-age',
+    type=float,
+    metavar='DAYS',
+    help="Evict cached reports older than this many days")
 parser.add_argument(
-    '--skip-check',
-    '-X',
-    action='append',
-    choices=HocrSpec.checks,
-    help="Skip one check")
+    '--cache-max-size',
+    type=float,
+    metavar='MB',
+    help="Evict the least recently used cached reports beyond this size")
 parser.add_argument(
-    '--parse-strict',
+    '--triage',
     action='store_true',
-    help="Parse HTML with less tolerance for errors")
+    help="Don't validate but scan for metadata and the number of pages, "
+         "lines and words and whether the required metadata is there")
+parser.add_argument(
+    '--timings',
+    action='store_true',
+    help="Print the time spent in every check to STDERR")
 parser.add_argument(
     '--silent',
     '-s',
@@ -52,18 +153,123 @@ parser.add_argument(
 
 
 def main():
+    if sys.argv[1:2] in (['serve'], ['client']):
+        from hocr_spec import server
+        if sys.argv[1] == 'serve':
+            return server.serve_main(sys.argv[2:])
+        return server.client_main(sys.argv[2:])
     args = parser.parse_args()
 
+    if args.triage:
+        return triage(args)
+    sources = list(iter_sources(args.sources, args.include))
+    jobs = 1 if '-' in sources else args.jobs
+    # Imported here, so --help and --triage don't pay for them
+    from hocr_spec.pool import HocrValidatorPool
+    cache = None
+    if args.cache_dir:
+        from hocr_spec.cache import HocrResultCache
+        cache = HocrResultCache(
+            args.cache_dir,
+            max_age=args.cache_max_age * 86400 if args.cache_max_age else None,
+            max_size=int(args.cache_max_size * 1024 * 1024)
+            if args.cache_max_size else None)
+    pool = HocrValidatorPool(args.profile,
+                             jobs=jobs,
+                             chunksize=args.chunksize,
+                             cache=cache,
+                             skip_check=args.skip_check,
+                             add_check=args.add_check,
+                             implicit_capabilities=args.implicit_capabilities)
+    writer = None
+    if not args.silent and args.format != 'bool':
+        writer = HocrValidator.writer(args.format, sys.stdout)
+        writer.begin()
+    failed = 0
+    kwargs = {}
+    if args.fail_fast:
+        kwargs['max_errors'] = 1
+    elif args.max_errors:
+        kwargs['max_errors'] = args.max_errors
+    if args.timeout:
+        kwargs['timeout'] = args.timeout
+    if args.aggregate:
+        kwargs['aggregate'] = args.aggregate_lines
+    if len(sources) == 1 and isinstance(sources[0], str) and \
+            sources[0] != '-' and args.jobs and \
+            not set(kwargs) - set(['aggregate']):
+        kwargs['jobs'] = args.jobs
+    if writer and args.format == 'jsonl' and not args.aggregate and \
+            not cache and not args.timings and 'jobs' not in kwargs and \
+            min(pool.jobs, len(sources)) <= 1:
+        failed = issues(args, sources, writer, kwargs)
+        writer.end()
+        sys.exit(0 if not failed else 1)
+    for report in pool.validate(sources,
+                                parse_strict=args.parse_strict,
+                                filename=args.filename,
+                                streaming=args.stream,
+                                timings=args.timings,
+                                **kwargs):
+        failed += not report.is_valid()
+        if args.timings:
+            sys.stderr.write("Timings of %s\n%s\n" % (
+                report.filename, report.timings.format()))
+        if writer:
+            writer.write(report)
+        elif not args.silent:
+            print(report.format(args.format))
+    if writer:
+        writer.end()
+    sys.exit(0 if not failed else 1)
+
+
+def issues(args, sources, writer, kwargs):
+    """
+    Validate the documents one after another and write their issues as
+    they are found.
+
+    Returns:
+        Number of invalid documents
+    """
     validator = HocrValidator(args.profile,
                               skip_check=args.skip_check,
+                              add_check=args.add_check,
                               implicit_capabilities=args.implicit_capabilities)
     failed = 0
-    for source in args.sources:
-        report = validator.validate(
-            source, parse_strict=args.parse_strict, filename=args.filename)
-        failed += not report.is_valid()
-        if not args.silent:
-            print(report.format(args.format))
+    for source in sources:
+        filename = args.filename or str(source)
+        f = source.open() if not isinstance(source, str) else source
+        try:
+            valid = True
+            for item in validator.iter_issues(f, args.parse_strict, **kwargs):
+                valid = valid and item.level not in ('ERROR', 'FATAL')
+                writer.write_item(filename, item)
+                sys.stdout.flush()
+            failed += not valid
+        finally:
+            if f is not source:
+                f.close()
+    return failed
+
+
+def triage(args):
+    from hocr_spec.triage import HocrTriage
+    spec = HocrSpec(args.profile,
+                    skip_check=args.skip_check,
+                    add_check=args.add_check,
+                    implicit_capabilities=args.implicit_capabilities)
+    failed = 0
+    for source in iter_sources(args.sources, args.include):
+        if isinstance(source, str):
+            result = HocrTriage(source, spec, filename=args.filename)
+        else:
+            with source.open() as f:
+                result = HocrTriage(f, spec,
+                                    filename=args.filename or str(source))
+        failed += not result.is_go()
+        if not args.silent and args.format != 'bool':
+            print(result.format(args.format))
     sys.exit(0 if not failed else 1)
 
 
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+
+from builtins import object
+
+from array import array
+
+from .geometry import load_numpy
+
+TYPECODES = {int: 'q', float: 'd'}
+
+
+def _buffer(values, dtype, width=None):
+    """
+    `values` as NumPy array, sharing its memory, if NumPy is installed.
+    """
+    numpy = load_numpy()
+    if numpy is None:
+        return values
+    values = numpy.frombuffer(values, dtype=dtype) if len(values) \
+        else numpy.zeros(0, dtype=dtype)
+    return values.reshape(-1, width) if width else values
+
+
+class HocrPropertyColumn(object):
+    """
+    Values of one 'title' property for all rows of HocrPropertyColumns.
+
+    The layout depends on the spec of the property:
+
+    - scalar numbers: `values` with one value per row
+    - lists with a fixed `width`, e.g. bbox: `values` with `width` values
+      per row, as (rows, width) array with NumPy
+    - other lists: the values of row i are values[offsets[i]:offsets[i+1]].
+      For two-dimensional lists, e.g. cuts, these are the positions of the
+      inner lists in `inner_offsets` and the values of inner list j are
+      values[inner_offsets[j]:inner_offsets[j+1]]
+    - strings: `values` is a list
+
+    Rows without the property, with a fixed width list of another length or
+    with numbers beyond the range of the buffer, e.g. integers above int64,
+    have `present` set to 0 and zeros as values.
+
+    Buffers are array.array or, if NumPy is installed, NumPy arrays sharing
+    their memory.
+
+    Args:
+        name (str): Name of the property
+        prop_spec (HocrSpecProperty): Spec of the property
+    """
+
+    def __init__(self, name, prop_spec):
+        self.name = name
+        self.spec = prop_spec
+        self.width = prop_spec.width if prop_spec.list else None
+        self.dimensions = len(prop_spec.split_pattern) if prop_spec.list else 0
+        self.ragged = prop_spec.list and not self.width
+        typecode = TYPECODES.get(prop_spec.type)
+        self.values = array(typecode) if typecode else []
+        self.present = array('B')
+        self.offsets = array('q', [0]) if self.ragged else None
+        self.inner_offsets = array('q', [0]) \
+            if self.ragged and self.dimensions == 2 else None
+
+    def append(self, value):
+        """
+        Append the parsed value of the next row or None if it has none.
+        """
+        values = self.values
+        start = len(values)
+        if self.ragged:
+            inner_start = len(self.inner_offsets) \
+                if self.inner_offsets is not None else None
+            if value is not None:
+                try:
+                    if self.inner_offsets is None:
+                        values.extend(value)
+                    else:
+                        for inner in value:
+                            values.extend(inner)
+                            self.inner_offsets.append(len(values))
+                except OverflowError:
+                    del values[start:]
+                    if inner_start is not None:
+                        del self.inner_offsets[inner_start:]
+                    value = None
+            self.present.append(value is not None)
+            self.offsets.append(len(self.inner_offsets) - 1
+                                if self.inner_offsets is not None
+                                else len(values))
+        elif self.width:
+            if value is not None and len(value) == self.width:
+                try:
+                    values.extend(value)
+                    self.present.append(1)
+                    return
+                except OverflowError:
+                    del values[start:]
+            values.extend([0] * self.width)
+            self.present.append(0)
+        else:
+            if value is not None:
+                try:
+                    values.append(value)
+                    self.present.append(1)
+                    return
+                except OverflowError:
+                    pass
+            values.append(None if isinstance(values, list) else 0)
+            self.present.append(0)
+
+    def freeze(self):
+        """
+        Turn the buffers into NumPy arrays if NumPy is installed.
+        """
+        if isinstance(self.values, array):
+            dtype = 'int64' if self.values.typecode == 'q' else 'float64'
+            self.values = _buffer(self.values, dtype, self.width)
+        self.present = _buffer(self.present, 'bool')
+        if self.offsets is not None:
+            self.offsets = _buffer(self.offsets, 'int64')
+        if self.inner_offsets is not None:
+            self.inner_offsets = _buffer(self.inner_offsets, 'int64')
+
+    def out_of_range(self, low=None, high=None):
+        """
+        Numeric values outside [low, high], of scalar or one-dimensional
+        list properties.
+
+        Requires NumPy.
+
+        Args:
+            low (Optional[float]): Default: Minimum of the range in the spec
+            high (Optional[float]): Default: Maximum of the range in the spec
+
+        Returns:
+            Tuple of arrays (rows, positions, values) of the offending
+            values, the position being that in the list of the row, 0 for
+            scalars
+        """
+        if self.inner_offsets is not None:
+            raise ValueError("%s is two-dimensional" % self.name)
+        if low is None or high is None:
+            if not self.spec.range:
+                raise ValueError("%s has no range" % self.name)
+            low = self.spec.range[0] if low is None else low
+            high = self.spec.range[1] if high is None else high
+        numpy = load_numpy()
+        values = self.values.reshape(-1)
+        bad = numpy.flatnonzero((values < low) | (values > high))
+        if self.ragged:
+            rows = numpy.searchsorted(self.offsets, bad, side='right') - 1
+            positions = bad - self.offsets[rows]
+        elif self.width:
+            rows, positions = bad // self.width, bad % self.width
+        else:
+            rows, positions = bad, numpy.zeros(len(bad), dtype='int64')
+        keep = self.present[rows]
+        return rows[keep], positions[keep], values[bad][keep]
+
+
+class HocrPropertyColumns(object):
+    """
+    'title' properties of the hOCR elements of a document as columns, one
+    row per element with an 'ocr*' class and a 'title', in document order.
+
+    Elements whose title can't be parsed are not rows but listed in
+    `errors`.
+
+    Args:
+        spec (HocrSpec): Spec with the property parser and specs
+        root (lxml.etree._Element): Element to extract properties of,
+            including itself
+        props (Optional[Iterable[str]]): Names of the properties to extract.
+            Default: All
+        context (Optional[HocrDocumentContext]): Context to take parsed
+            properties from
+
+    Attributes:
+        elements (List[_Element]): Element of every row
+        index (Buffer): Position of the element among all elements of `root`
+        parent (Buffer): Row of the closest ancestor of the element that is
+            a row as well or -1
+        class_id (Buffer): Position of the first class of the element in
+            `classes`
+        classes (List[str]): Class names
+        sourceline (Buffer): Line of the element
+        columns (Dict[str,HocrPropertyColumn]): Columns by property name
+        errors (List[Tuple[_Element,Exception]]): Elements whose title
+            can't be parsed and the error
+    """
+
+    def __init__(self, spec, root, props=None, context=None):
+        if context is None:
+            context = spec.context(root)
+        if props is None:
+            props = sorted(spec.property_specs)
+        self.columns = dict((name, HocrPropertyColumn(name,
+                                                      spec.property_specs[name]))
+                            for name in props)
+        self.elements = []
+        self.classes = []
+        self.errors = []
+        index = array('q')
+        parent = array('q')
+        class_id = array('q')
+        sourceline = array('q')
+        class_ids = {}
+        # Row of every element that is a row
+        rows = {}
+        appends = [(column.append, column.name)
+                   for column in self.columns.values()]
+        properties = context.properties
+        for i, el in enumerate(root.iter('*')):
+            tokens = el.get('class')
+            if not tokens or not tokens.startswith('ocr') or \
+                    el.get('title') is None:
+                continue
+            try:
+                parsed = properties(el)
+            except Exception as e:
+                self.errors.append((el, e))
+                continue
+            # Elements precede their descendants, so the closest ancestor
+            # that is a row, usually the parent, already has its row
+            ancestor = el.getparent()
+            while ancestor is not None and not ancestor in rows:
+                ancestor = ancestor.getparent()
+            parent.append(rows[ancestor] if ancestor is not None else -1)
+            rows[el] = len(self.elements)
+            self.elements.append(el)
+            index.append(i)
+            name = tokens.split(None, 1)[0]
+            if not name in class_ids:
+                class_ids[name] = len(self.classes)
+                self.classes.append(name)
+            class_id.append(class_ids[name])
+            sourceline.append(el.sourceline or 0)
+            for append, prop in appends:
+                append(parsed.get(prop))
+        self.index = _buffer(index, 'int64')
+        self.parent = _buffer(parent, 'int64')
+        self.class_id = _buffer(class_id, 'int64')
+        self.sourceline = _buffer(sourceline, 'int64')
+        for column in self.columns.values():
+            column.freeze()
+
+    def __len__(self):
+        return len(self.elements)
+
+    def __getitem__(self, name):
+        return self.columns[name]
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+
+from builtins import object
+
+try:
+    from types import MappingProxyType
+except ImportError:
+    MappingProxyType = dict
+
+from .spec import HocrSourceLine
+
+# Compiled checkers by configuration, see HocrClassCompiler.checkers
+_checkers = {}
+
+
+class HocrClassCompiler(object):
+    """
+    Compiles the class specs of a HocrSpec and its profile into one Python
+    function per class, which checks an element the same way
+    HocrSpec.check_classes does in its generic form, reporting the same
+    items in the same order.
+
+    Everything that is fixed for the profile is decided at compile time
+    rather than for every element:
+
+        - classes that are `not_checked` only report so
+        - `deprecated` and `obsolete` are compared with the profile version
+        - empty `tagnames`, `must_not_contain`, `one_ancestor`,
+          `required_attrib` and `required_properties` emit no code
+        - required capabilities among the profile's
+          `implicit_capabilities`, or all of them if those contain '*', are
+          not looked up
+
+    Capabilities declared by a document are only known when it is checked
+    and are still looked up in its context.
+
+    Args:
+        spec (HocrSpec): The spec to compile
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.implicit_capabilities = frozenset(
+            spec.profile.implicit_capabilities)
+
+    @staticmethod
+    def key(spec):
+        """
+        The configuration the checkers of `spec` depend on.
+        """
+        profile = spec.profile
+        return (spec.__class__, profile.version,
+                tuple(sorted(set(profile.implicit_capabilities))))
+
+    @classmethod
+    def checkers(cls, spec):
+        """
+        The checkers of `spec` by class name, compiled once per
+        configuration.
+
+        Returns:
+            Mapping[str,Callable[[HocrValidator.Report,HocrDocumentContext,
+            lxml.etree._Element],None]]
+        """
+        key = cls.key(spec)
+        checkers = _checkers.get(key)
+        if checkers is None:
+            checkers = _checkers[key] = cls(spec).compile()
+        return checkers
+
+    def compile(self):
+        """
+        Compile a checker for every class of the spec.
+        """
+        namespace = {'HocrSourceLine': HocrSourceLine}
+        source = []
+        names = {}
+        for i, (class_name, class_spec) in enumerate(sorted(
+                self.spec.class_specs.items())):
+            names[class_name] = 'check_%d' % i
+            source.extend(self.source(names[class_name], class_spec,
+                                      'c%d' % i, namespace))
+        self.code = '\n'.join(source) + '\n'
+        exec(compile(self.code, '<hocr-spec checkers %s>' % (
+            self.key(self.spec)[1:],), 'exec'), namespace)
+        return MappingProxyType(dict(
+            (class_name, namespace[name]) for class_name, name in
+            names.items()))
+
+    def source(self, name, c, prefix, namespace):
+        """
+        Source lines of the function `name` checking elements of class `c`.
+
+        Constants the function refers to are put into `namespace` under
+        names starting with `prefix`.
+        """
+        spec = prefix + '_spec'
+        namespace[spec] = c
+        lines = ['def %s(report, context, el):' % name,
+                 '    add = report.add']
+        if c.not_checked:
+            lines.append(
+                "    add('WARN', el.sourceline, "
+                "'Validation of %%s not tested in-depth', %s, "
+                "rule='not_checked')" % spec)
+            return lines
+        version = self.spec.profile.version
+        if c.deprecated and version >= c.deprecated[0]:
+            lines.append(
+                "    add('WARN', el.sourceline, "
+                "'%%s %%s has been deprecated since version %%s: %%s', "
+                "el, %s, %r, %r, rule='deprecated')" % (
+                    spec, c.deprecated[0], c.deprecated[1]))
+        if c.obsolete and version >= c.obsolete[0]:
+            lines.append(
+                "    add('ERROR', el.sourceline, "
+                "'%%s %%s has been obsolete since version %%s: %%s', "
+                "el, %s, %r, %r, rule='obsolete')" % (
+                    spec, c.obsolete[0], c.obsolete[1]))
+        if c.tagnames:
+            tagnames = prefix + '_tagnames'
+            namespace[tagnames] = c.tagnames
+            if len(c.tagnames) == 1:
+                condition = 'el.tag != %r' % c.tagnames[0]
+            else:
+                namespace[prefix + '_tagset'] = frozenset(c.tagnames)
+                condition = 'not el.tag in %s_tagset' % prefix
+            lines.extend([
+                "    if %s:" % condition,
+                "        add('ERROR', el.sourceline, "
+                "\"%%s must have a tag name from %%s, not '%%s'\", "
+                "el, %s, el.tag, rule='tagname')" % tagnames])
+        if c.must_not_contain or c.one_ancestor:
+            lines.append('    index = context.index')
+        for contains_class in c.must_not_contain:
+            lines.extend([
+                "    contained = index.first_descendant(el, %r)" %
+                contains_class,
+                "    if contained is not None:",
+                "        add('ERROR', el.sourceline, "
+                "\"%%s must not contain '%%s', but does contain %%s in line "
+                "%%d\", el, %r, contained, "
+                "HocrSourceLine(contained.sourceline), "
+                "rule='must_not_contain')" % contains_class])
+        for ancestor_class in c.one_ancestor:
+            lines.extend([
+                "    nr = index.count_ancestors(el, %r)" % ancestor_class,
+                "    if 1 != nr:",
+                "        add('ERROR', el.sourceline, "
+                "\"%%s must be descendant of exactly one '%%s', but found "
+                "%%d\", el, %r, nr, rule='one_ancestor')" % ancestor_class])
+        for attrib in c.required_attrib:
+            lines.extend([
+                "    if not %r in el.attrib:" % attrib,
+                "        add('ERROR', el.sourceline, "
+                "\"%%s must have attribute '%%s'\", el, %r, "
+                "rule='required_attrib')" % attrib])
+        for prop in c.required_properties:
+            lines.extend([
+                "    try:",
+                "        props = context.properties(el)",
+                "    except KeyError as e:",
+                "        add('ERROR', el.sourceline, "
+                "'%s Cannot parse properties, missing atttribute: %s', "
+                "el, str(e), rule='title_missing')",
+                "    except Exception as e:",
+                "        add('ERROR', el.sourceline, "
+                "'Error parsing properties for \"%s\" : %s', "
+                "el, str(e), rule='title_syntax')",
+                "    else:",
+                "        if not %r in props:" % prop,
+                "            add('ERROR', el.sourceline, "
+                "\"Element %%s must have title prop '%%s'\", el, %r, "
+                "rule='required_property')" % prop])
+        if '*' not in self.implicit_capabilities:
+            for cap in c.required_capabilities:
+                if cap in self.implicit_capabilities:
+                    continue
+                lines.extend([
+                    "    if not context.has_capability(%r):" % cap,
+                    "        add('ERROR', el.sourceline, "
+                    "'%%s: Requires the \"%%s\" capability but it is not "
+                    "specified', el, %r, rule='capability')" % cap])
+        return lines
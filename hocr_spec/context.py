@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+from builtins import object
+
+import copy
+import re
+
+from .index import HocrStructureIndex
+from .timings import timer
+
+
+class HocrDocumentContext(object):
+    """
+    Facts about a document that are shared by all checks and computed once
+    per validation run.
+
+    A context can be narrowed to a subtree with `subtree`, e.g. to check
+    a document page by page. Subtree contexts share the document-level
+    facts, such as capabilities and the classes found so far, but are
+    `partial`: document-level rules are left to the context of the root.
+
+    Args:
+        spec (HocrSpec): The spec the document is validated against
+        root (lxml.etree._Element): Root element of the document
+        timings (Optional[HocrTimings]): Where to record timings, if at all
+    """
+
+    def __init__(self, spec, root, timings=None):
+        self.spec = spec
+        self.root = root
+        self.timings = timings
+        self.document_capabilities = self.parse_capabilities(root)
+        # Effective capabilities: those of the document and of the profile
+        self.capabilities = frozenset(
+            self.document_capabilities +
+            list(spec.profile.implicit_capabilities))
+        self.all_capabilities = '*' in self.capabilities
+        # Classes found in the document, for 'must_exist'
+        self.found_classes = set()
+        # First descendants of subtrees that were cleared after checking
+        self.detached = {}
+        self.partial = False
+        self.__index = None
+        self.__properties = {}
+
+    @staticmethod
+    def parse_capabilities(root):
+        """
+        List all capabilities declared in the document's metadata.
+        """
+        try:
+            caps = root.xpath('//meta[@name="ocr-capabilities"]/@content')[0]
+            return re.split(r'\s+', caps)
+        except IndexError as e: return []
+
+    @property
+    def index(self):
+        """
+        Structural index of the document, built on first use.
+        """
+        if self.__index is None:
+            spec = self.spec
+            t0 = timer()
+            self.__index = HocrStructureIndex(
+                self.root, spec.class_specs,
+                ancestor_classes=spec.ancestor_classes,
+                descendant_classes=spec.descendant_classes,
+                detached=self.detached)
+            if self.timings is not None:
+                self.timings.add('index', timer() - t0)
+                self.timings.count('elements indexed',
+                                   len(self.__index.elements))
+        return self.__index
+
+    def subtree(self, root, partial=True):
+        """
+        Context for checking only the subtree of `root`.
+        """
+        context = copy.copy(self)
+        context.root = root
+        context.partial = partial
+        context.__index = None
+        context.__properties = {}
+        return context
+
+    def properties(self, el):
+        """
+        Parsed 'title' properties of `el`, parsed at most once per run.
+
+        Raises the error of parsing, e.g. KeyError if `el` has no title.
+        """
+        try:
+            props = self.__properties[el]
+        except KeyError:
+            timings = self.timings
+            if timings is not None:
+                t0 = timer()
+            try:
+                props = self.spec.property_parser.parse(el.attrib['title'])
+            except Exception as e:
+                props = e
+            if timings is not None:
+                timings.add('parse_properties', timer() - t0)
+            self.__properties[el] = props
+        if isinstance(props, Exception):
+            raise props
+        return props
+
+    def has_capability(self, cap):
+        """
+        Whether capability `cap` is enabled for the document.
+        """
+        if self.timings is not None:
+            self.timings.count('capability lookups')
+        return self.all_capabilities or cap in self.capabilities
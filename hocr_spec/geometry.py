@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+
+from builtins import object
+
+# NumPy takes longer to import than the rest of hocr_spec, it is only
+# imported when it is needed, see load_numpy
+numpy = None
+_numpy_missing = False
+
+# Largest absolute coordinate of a box that is checked, so that widths,
+# heights, areas and sweep keys fit into int64
+MAX_COORDINATE = 2 ** 30
+
+
+def load_numpy():
+    """
+    Import NumPy on first use.
+
+    Returns:
+        The numpy module or None if it is not installed
+    """
+    global numpy, _numpy_missing
+    if numpy is None and not _numpy_missing:
+        try:
+            import numpy
+        except ImportError:
+            _numpy_missing = True
+    return numpy
+
+
+class HocrBoxes(object):
+    """
+    Bounding boxes of the hOCR elements of a document as NumPy arrays, for
+    checking their geometry without looping over pairs of elements.
+
+    Elements are those with an 'ocr*' class and a 'title' with a 'bbox' of
+    four values, in document order. Boxes with another number of values
+    are listed in `malformed` instead, boxes with coordinates beyond
+    MAX_COORDINATE in `out_of_range`. Elements whose title can't be parsed
+    are left out, check_properties reports them.
+
+    The arrays are taken from the 'bbox' column of the properties extracted
+    into HocrPropertyColumns, so elements are only looped over once, to
+    look up their parsed properties.
+
+    Args:
+        root (lxml.etree._Element): Element to gather boxes of, including
+            itself
+        context (HocrDocumentContext): Context to take parsed properties from
+
+    Attributes:
+        elements (List[_Element]): Elements with a box
+        boxes (numpy.ndarray): (n, 4) array of x0, y0, x1, y1
+        parents (numpy.ndarray): Position of the closest ancestor with a box
+            in `elements` or -1
+        classes (numpy.ndarray): Id of the first class of the element
+        malformed (List[Tuple[_Element,int]]): Elements with a 'bbox' of
+            another length than four and that length
+        out_of_range (List[Tuple[_Element,List[int]]]): Elements with a
+            'bbox' with coordinates beyond MAX_COORDINATE and that 'bbox'
+    """
+
+    def __init__(self, root, context):
+        from .columns import HocrPropertyColumns
+        load_numpy()
+        columns = HocrPropertyColumns(context.spec, root, ['bbox'], context)
+        column = columns['bbox']
+        values = column.values
+        rows = numpy.flatnonzero(column.present)
+        beyond = rows[((values[rows] > MAX_COORDINATE) |
+                       (values[rows] < -MAX_COORDINATE)).any(axis=1)]
+        self.malformed = []
+        out_of_range = dict((row, values[row].tolist())
+                            for row in beyond.tolist())
+        # Rows without a box of four int64 values, only the parsed
+        # properties know why
+        for row in numpy.flatnonzero(~column.present).tolist():
+            el = columns.elements[row]
+            bbox = context.properties(el).get('bbox')
+            if bbox is None:
+                continue
+            if len(bbox) != 4:
+                self.malformed.append((el, len(bbox)))
+            else:
+                out_of_range[row] = bbox
+        self.out_of_range = [(columns.elements[row], out_of_range[row])
+                             for row in sorted(out_of_range)]
+        rows = numpy.setdiff1d(rows, beyond, assume_unique=True)
+        self.elements = [columns.elements[row] for row in rows.tolist()]
+        self.boxes = values[rows].reshape(-1, 4)
+        self.classes = columns.class_id[rows]
+        self.parents = self.__parents(columns.parent, rows)
+
+    @staticmethod
+    def __parents(row_parents, rows):
+        """
+        Position in `rows` of the closest ancestor with a box of every box,
+        following the ancestors of rows without a box for all boxes at once.
+
+        Args:
+            row_parents (numpy.ndarray): Closest ancestor row of every row,
+                see HocrPropertyColumns.parent
+            rows (numpy.ndarray): Rows with a box
+        """
+        # Position of the box of every row, -1 for rows without one and, as
+        # last item, for the parent -1
+        box = numpy.full(len(row_parents) + 1, -1, dtype=numpy.int64)
+        box[rows] = numpy.arange(len(rows))
+        parents = row_parents[rows]
+        pending = numpy.flatnonzero((parents >= 0) & (box[parents] < 0))
+        while len(pending):
+            parents[pending] = row_parents[parents[pending]]
+            pending = pending[(parents[pending] >= 0) &
+                              (box[parents[pending]] < 0)]
+        return box[parents]
+
+    def __len__(self):
+        return len(self.elements)
+
+    def inverted(self):
+        """
+        Positions of boxes with x0 > x1 or y0 > y1.
+        """
+        b = self.boxes
+        return numpy.flatnonzero((b[:, 0] > b[:, 2]) | (b[:, 1] > b[:, 3]))
+
+    def empty(self):
+        """
+        Positions of boxes with zero width or height.
+        """
+        b = self.boxes
+        return numpy.flatnonzero((b[:, 0] == b[:, 2]) | (b[:, 1] == b[:, 3]))
+
+    def uncontained(self):
+        """
+        Positions of boxes that are not within the box of their closest
+        ancestor with one. Inverted boxes are not considered.
+        """
+        b = self.boxes
+        ok = (b[:, 0] <= b[:, 2]) & (b[:, 1] <= b[:, 3])
+        child = numpy.flatnonzero(ok & (self.parents >= 0))
+        parent = self.parents[child]
+        child = child[ok[parent]]
+        parent = self.parents[child]
+        outside = ((b[child, 0] < b[parent, 0]) |
+                   (b[child, 1] < b[parent, 1]) |
+                   (b[child, 2] > b[parent, 2]) |
+                   (b[child, 3] > b[parent, 3]))
+        return child[outside]
+
+    def sibling_overlaps(self, threshold):
+        """
+        Boxes overlapping an earlier sibling box, i.e. with the same closest
+        ancestor with a box and the same first class, by more than
+        `threshold` times the area of the smaller one. Only the first such
+        sibling is returned for every box.
+
+        Candidates are found with a sort-based sweep along the axis with
+        fewer candidates per group of siblings, so the cost depends on the
+        number of boxes overlapping in one direction rather than on the
+        number of pairs.
+
+        Returns:
+            Tuple of arrays (later, earlier, ratio) of the positions of the
+            boxes in document order, the positions of the first sibling they
+            overlap and the intersection relative to the smaller area
+        """
+        b = self.boxes
+        area = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+        candidates = numpy.flatnonzero((self.parents >= 0) & (area > 0) &
+                                       (b[:, 0] < b[:, 2]) &
+                                       (b[:, 1] < b[:, 3]))
+        empty = numpy.zeros(0, dtype=numpy.int64)
+        if len(candidates) < 2:
+            return empty, empty, numpy.zeros(0)
+        # Group siblings by closest ancestor and class
+        keys = (self.parents[candidates] * (self.classes.max() + 1) +
+                self.classes[candidates])
+        _, groups = numpy.unique(keys, return_inverse=True)
+        groups = groups.reshape(-1)
+        n_groups = groups.max() + 1
+        cb = b[candidates]
+        sweeps = []
+        for axis in (0, 1):
+            start, end = cb[:, axis], cb[:, axis + 2]
+            lo = start.min()
+            span = end.max() - lo + 1
+            order = numpy.lexsort((start, groups))
+            starts = (groups * span + (start - lo))[order]
+            ends = (groups * span + (end - lo))[order]
+            # Boxes after each box in the sweep that start before it ends
+            hi = numpy.searchsorted(starts, ends, side='left')
+            count = numpy.maximum(hi - numpy.arange(len(order)) - 1, 0)
+            sweeps.append((order, count))
+        per_group = [numpy.bincount(groups[order], weights=count,
+                                    minlength=n_groups)
+                     for order, count in sweeps]
+        use_y = per_group[1] < per_group[0]
+        first = []
+        second = []
+        for axis, (order, count) in enumerate(sweeps):
+            count = numpy.where(use_y[groups[order]] == bool(axis), count, 0)
+            total = count.sum()
+            if not total:
+                continue
+            i = numpy.repeat(numpy.arange(len(order)), count)
+            offset = (numpy.arange(total) -
+                      numpy.repeat(numpy.cumsum(count) - count, count) + 1)
+            first.append(order[i])
+            second.append(order[i + offset])
+        if not first:
+            return empty, empty, numpy.zeros(0)
+        i = candidates[numpy.concatenate(first)]
+        j = candidates[numpy.concatenate(second)]
+        width = numpy.minimum(b[i, 2], b[j, 2]) - numpy.maximum(b[i, 0], b[j, 0])
+        height = numpy.minimum(b[i, 3], b[j, 3]) - numpy.maximum(b[i, 1], b[j, 1])
+        ratio = (numpy.clip(width, 0, None) * numpy.clip(height, 0, None) /
+                 numpy.minimum(area[i], area[j]).astype(float))
+        hit = ratio > threshold
+        later = numpy.maximum(i[hit], j[hit])
+        earlier = numpy.minimum(i[hit], j[hit])
+        ratio = ratio[hit]
+        order = numpy.lexsort((earlier, later))
+        later, earlier, ratio = later[order], earlier[order], ratio[order]
+        # Only the first sibling each box overlaps
+        later, first = numpy.unique(later, return_index=True)
+        return later, earlier[first], ratio[first]
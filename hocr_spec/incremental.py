@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+
+from builtins import object
+
+import hashlib
+import json
+from array import array
+
+from lxml import etree
+
+from .spec import HocrSourceLine
+from .stream import HocrStreamChecker
+
+# libxml2 doesn't count the lines of HTML beyond this one
+MAX_SOURCELINE = 65535
+
+
+class HocrPageFragment(object):
+    """
+    What checking one page contributed to a run: its report items and the
+    summaries the document-level checks need once the page is cleared.
+
+    Args:
+        sourceline (int): Line of the page
+        items (List[HocrValidator.ReportItem]): Items of the page, detached
+        classes (FrozenSet[str]): Classes found in the page, for 'must_exist'
+        detached (Optional[Dict[str,_Element]]): First descendants of the
+            page, see HocrStructureIndex.detach
+    """
+    __slots__ = ('sourceline', 'items', 'classes', 'detached')
+
+    def __init__(self, sourceline, items, classes, detached):
+        self.sourceline = sourceline
+        self.items = items
+        self.classes = classes
+        self.detached = detached
+
+    def moved(self, sourceline):
+        """
+        The items and detached summary, moved to start at `sourceline`.
+
+        Lines within the page, including those in the arguments of messages
+        marked as HocrSourceLine, are shifted up to MAX_SOURCELINE, lines
+        before it are kept.
+        """
+        start = self.sourceline
+        delta = sourceline - start
+        if not delta:
+            return self.items, self.detached
+
+        def move(line):
+            if line is None or line < start:
+                return line
+            return min(line + delta, MAX_SOURCELINE)
+
+        items = []
+        for item in self.items:
+            moved = item.__class__(
+                item.level, move(item.sourceline), item.template,
+                *[HocrSourceLine(move(arg))
+                  if isinstance(arg, HocrSourceLine) else arg
+                  for arg in item.args], rule=item.rule)
+            items.append(moved)
+        detached = None
+        if self.detached is not None:
+            detached = {}
+            for c, el in self.detached.items():
+                copy = etree.Element(el.tag, dict(el.attrib))
+                copy.sourceline = move(el.sourceline)
+                detached[c] = copy
+        return items, detached
+
+
+class HocrPageCache(object):
+    """
+    Report fragments of the pages of a document from its previous
+    validation, to re-check only the pages that changed since.
+
+    Pages are identified by a fingerprint of their subtree, including the
+    lines of its elements relative to the page, of their ancestors and of
+    the configuration and capabilities they were checked with. A page that
+    merely moved, e.g. because a page before it grew, is not checked again
+    but its items are moved to its new lines.
+
+    Only the pages of the latest run are kept. Use one cache per document
+    and don't share it between threads.
+
+    Attributes:
+        fragments (Dict[str,HocrPageFragment]): Fragments by fingerprint
+        hits (int): Pages reused in the latest run
+        misses (int): Pages checked in the latest run
+    """
+
+    def __init__(self):
+        self.fragments = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.fragments)
+
+    def clear(self):
+        self.fragments = {}
+
+    def fingerprint(self, config, page):
+        """
+        Fingerprint of `page` checked with the configuration `config`.
+        """
+        h = hashlib.sha256(config)
+        for ancestor in page.iterancestors():
+            h.update(repr((ancestor.tag, sorted(ancestor.items()),
+                           ancestor.sourceline)).encode('utf-8'))
+        h.update(etree.tostring(page, with_tail=False))
+        # Serialization normalizes whitespace within tags, which can move
+        # elements to other lines
+        start = page.sourceline or 0
+        lines = array('q', [el.sourceline or start for el in page.iter()])
+        if max(lines) >= MAX_SOURCELINE:
+            # Lines beyond can't be told apart, nor moved
+            h.update(repr(start).encode('utf-8'))
+        h.update(array('q', [line - start for line in lines]).tobytes())
+        return h.hexdigest()
+
+
+class HocrIncrementalChecker(HocrStreamChecker):
+    """
+    Check a document page by page like HocrStreamChecker, reusing the
+    report fragments of pages that did not change since the previous run.
+
+    Document-level rules, i.e. metadata, capabilities and 'must_exist',
+    are checked on every run, from the classes and first descendants cached
+    for the reused pages. The report is the same as that of checking the
+    whole document with HocrStreamChecker.
+
+    Args:
+        spec (HocrSpec): The spec to check against
+        pages (HocrPageCache): Fragments of the previous run, replaced by
+            those of this run
+    """
+
+    def __init__(self, spec, pages):
+        HocrStreamChecker.__init__(self, spec)
+        self.pages = pages
+        self.config = None
+        self.fragments = {}
+
+    def check(self, report, events):
+        self.config = None
+        self.fragments = {}
+        self.pages.hits = self.pages.misses = 0
+        HocrStreamChecker.check(self, report, events)
+        self.pages.fragments = self.fragments
+
+    def check_page(self, report, context, page):
+        spec = self.spec
+        if self.config is None:
+            profile = spec.profile
+            self.config = json.dumps([
+                profile.version,
+                spec.checks,
+                sorted(context.capabilities),
+                spec.overlap_threshold,
+            ]).encode('utf-8')
+        sourceline = page.sourceline
+        key = self.pages.fingerprint(self.config, page)
+        fragment = self.pages.fragments.get(key) or self.fragments.get(key)
+        if fragment is None:
+            self.pages.misses += 1
+            start = len(report.items)
+            page_context = HocrStreamChecker.check_page(self, report,
+                                                        context, page)
+            classes = frozenset()
+            if 'classes' in spec.checks:
+                classes = frozenset(c for el, names in
+                                    page_context.index.elements
+                                    for c in names)
+            self.fragments[key] = HocrPageFragment(
+                sourceline, report.items[start:], classes,
+                context.detached.get(page))
+            return page_context
+        self.pages.hits += 1
+        items, detached = fragment.moved(sourceline)
+        report.extend(items)
+        context.found_classes.update(fragment.classes)
+        if detached is not None:
+            context.detached[page] = detached
+        if context.timings is not None:
+            context.timings.count('pages')
+            context.timings.count('pages reused')
+        self.fragments[key] = HocrPageFragment(
+            sourceline, items, fragment.classes, detached)
+        report.detach()
+        page.clear()
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+from builtins import object
+
+from lxml import etree
+
+
+class HocrStructureIndex(object):
+    """
+    Structural index of a document, built in a single depth-first walk.
+
+    Answers "how many ancestors of class X does this element have" and
+    "what is the first descendant of class X of this element" in constant
+    time, instead of running an XPath per element.
+
+    Ancestors of `root` are counted as well, so a subtree can be indexed on
+    its own.
+
+    Args:
+        root (lxml.etree._Element): Element to index, including itself
+        class_names (Iterable[str]): Classes of elements to list in
+            `elements`, in document order
+        ancestor_classes (Iterable[str]): Classes to count ancestors of
+        descendant_classes (Iterable[str]): Classes to record the first
+            descendant of
+        detached (Optional[Dict[_Element,Dict[str,_Element]]]): First
+            descendants of elements whose children have been removed from
+            the tree, see `detach`
+    """
+
+    def __init__(self, root, class_names, ancestor_classes=(),
+                 descendant_classes=(), detached=None):
+        self.elements = []
+        self.ancestor_classes = tuple(ancestor_classes)
+        self.descendant_classes = frozenset(descendant_classes)
+        self.__ancestor_pos = dict((c, i) for i, c in
+                                   enumerate(self.ancestor_classes))
+        self.__ancestors = {}
+        self.__descendants = {}
+        self.__build(root, frozenset(class_names), detached or {})
+
+    def __build(self, root, class_names, detached):
+        ancestor_pos = self.__ancestor_pos
+        descendant_classes = self.descendant_classes
+        counts = [0] * len(self.ancestor_classes)
+        for ancestor in root.iterancestors():
+            tokens = ancestor.get('class')
+            for c in (tokens.split() if tokens else ()):
+                if c in ancestor_pos:
+                    counts[ancestor_pos[c]] += 1
+        # DFS stack of (counted ancestor positions, tracked classes,
+        # first descendants by class)
+        stack = []
+        for event, el in etree.iterwalk(root, events=('start', 'end'), tag='*'):
+            if event == 'start':
+                tokens = el.get('class')
+                tokens = tokens.split() if tokens else ()
+                classes = [c for c in tokens if c in class_names]
+                if classes:
+                    self.elements.append((el, classes))
+                    self.__ancestors[el] = tuple(counts)
+                counted = [ancestor_pos[c] for c in tokens if c in ancestor_pos]
+                for pos in counted:
+                    counts[pos] += 1
+                tracked = [c for c in tokens if c in descendant_classes]
+                stack.append((counted, tracked, {}))
+            else:
+                counted, tracked, firsts = stack.pop()
+                for pos in counted:
+                    counts[pos] -= 1
+                if el in detached:
+                    firsts.update(detached[el])
+                if firsts:
+                    self.__descendants[el] = firsts
+                if stack:
+                    parent_firsts = stack[-1][2]
+                    # el precedes its own descendants in document order
+                    for c in tracked:
+                        parent_firsts.setdefault(c, el)
+                    for c in firsts:
+                        parent_firsts.setdefault(c, firsts[c])
+
+    def count_ancestors(self, el, ancestor_class):
+        """
+        Number of ancestors of `el` with class `ancestor_class`.
+        """
+        return self.__ancestors[el][self.__ancestor_pos[ancestor_class]]
+
+    def first_descendant(self, el, descendant_class):
+        """
+        First descendant of `el` in document order with class
+        `descendant_class` or None.
+        """
+        firsts = self.__descendants.get(el)
+        if firsts:
+            return firsts.get(descendant_class)
+
+    def detach(self, el):
+        """
+        Summarize the first descendants of `el`, including itself, as
+        copies that stay valid after the subtree of `el` has been cleared.
+
+        Pass the summary as `detached` to index a tree in which the
+        subtree of `el` was cleared.
+        """
+        summary = {}
+        tokens = el.get('class')
+        for c in (tokens.split() if tokens else ()):
+            if c in self.descendant_classes:
+                summary.setdefault(c, el)
+        for c, descendant in (self.__descendants.get(el) or {}).items():
+            summary.setdefault(c, descendant)
+        for c in summary:
+            descendant = summary[c]
+            copy = etree.Element(descendant.tag, dict(descendant.attrib))
+            copy.sourceline = descendant.sourceline
+            summary[c] = copy
+        return summary
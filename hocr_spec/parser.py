@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+from builtins import map
+from builtins import object
+
+import re
+
+try:
+    from functools import lru_cache
+except ImportError:
+    lru_cache = None
+
+
+class HocrPropertyConverter(object):
+    """
+    Converts the raw value of one 'title' property according to its spec,
+    using precompiled split patterns.
+
+    Args:
+        prop_spec (HocrSpecProperty): Spec of the property
+    """
+
+    def __init__(self, prop_spec):
+        self.type = prop_spec.type
+        if prop_spec.list:
+            self.patterns = [re.compile(p) for p in prop_spec.split_pattern]
+        else:
+            self.patterns = []
+        self.dimensions = len(self.patterns) if prop_spec.list else 0
+        # str.split() is equivalent to splitting at r'\s+' unless the value
+        # is empty or has leading or trailing whitespace
+        self.split_whitespace = prop_spec.list and \
+            prop_spec.split_pattern[0] == r'\s+'
+
+    def __call__(self, v):
+        # If the property is a scalar value, apply the type to the value
+        if self.dimensions == 0:
+            return self.type(v)
+        # If the property is a list value, split the value at the
+        # property's 'split_pattern' and apply the type to its values
+        if self.dimensions == 1:
+            if self.split_whitespace and v and not v[0].isspace() \
+                    and not v[-1].isspace():
+                return list(map(self.type, v.split()))
+            return list(map(self.type, self.patterns[0].split(v)))
+        if self.dimensions == 2:
+            inner = self.patterns[1]
+            return [list(map(self.type, inner.split(vv)))
+                    for vv in self.patterns[0].split(v)]
+        return v
+
+
+class HocrPropertyParser(object):
+    """
+    Parser for the 'title' attribute, compiled from the property specs.
+
+    Converted values are memoized in a bounded LRU cache keyed on the raw
+    "key value" fragment of the title, since OCR engines repeat fragments
+    like 'x_wconf 96' or 'baseline 0 -5' over and over. Cached values are
+    shared and must not be modified.
+
+    Args:
+        properties (type): Class holding the property specs, i.e.
+            HocrSpecProperties
+        cache_size (int): Maximum number of cached fragments. 0 disables
+            the cache. Default: 0
+    """
+
+    separator = re.compile(r'\s*;\s*')
+    whitespace = re.compile(r'\s+')
+
+    def __init__(self, properties, cache_size=0):
+        self.properties = properties
+        self.converters = {}
+        for k in dir(properties):
+            prop_spec = getattr(properties, k)
+            if isinstance(prop_spec, properties.HocrSpecProperty):
+                self.converters[k] = HocrPropertyConverter(prop_spec)
+        self.cache_size = cache_size
+        self.__wrap_cache()
+
+    def __wrap_cache(self):
+        if self.cache_size and lru_cache:
+            self.parse_fragment = lru_cache(maxsize=self.cache_size)(
+                self.parse_fragment)
+
+    def __getstate__(self):
+        # The fragment cache can't be pickled, it starts out empty again
+        state = self.__dict__.copy()
+        state.pop('parse_fragment', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__wrap_cache()
+
+    def parse(self, title):
+        """
+        Parse a 'title' attribute value into a dict of properties.
+        """
+        ret = {}
+        parse_fragment = self.parse_fragment
+        # Split on semicolon, optionally preceded and followed by whitespace.
+        # Without whitespace around the title, str methods are equivalent.
+        if title and not title[0].isspace() and not title[-1].isspace():
+            fragments = [kv.strip() for kv in title.split(';')]
+        else:
+            fragments = self.separator.split(title)
+        for kv in fragments:
+            (k, v) = parse_fragment(kv)
+            ret[k] = v
+        return ret
+
+    def parse_fragment(self, kv):
+        """
+        Parse a single "key value" fragment into a (key, value) tuple.
+        """
+        # Split key and value at first whitespace
+        if kv and not kv[0].isspace() and not kv[-1].isspace():
+            (k, v) = kv.split(None, 1)
+        else:
+            (k, v) = self.whitespace.split(kv, 1)
+        # Make sure the property is from the list of known properties
+        try:
+            try:
+                convert = self.converters[k]
+            except KeyError:
+                raise AttributeError("type object '%s' has no attribute '%s'"
+                                     % (self.properties.__name__, k))
+            v = convert(v)
+        except Exception as e:
+            raise type(e)(str(e) + ' (%s on "%s")' % (type(e).__name__, k))
+        return (k, v)
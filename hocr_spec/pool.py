@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+from builtins import object
+
+from .validate import HocrValidator
+
+# The validator of a worker process, see _init_worker
+_validator = None
+
+
+def _init_worker(profile, kwargs):
+    global _validator
+    _validator = HocrValidator(profile, **kwargs)
+
+
+def _validate(args):
+    source, kwargs = args
+    return _validator.validate(source, **kwargs)
+
+
+class HocrValidatorPool(object):
+    """
+    Validate many documents in a pool of worker processes.
+
+    Every worker builds its HocrValidator once and reports are returned in
+    the order of the sources.
+
+    Args:
+        profile (str): Validation profile
+        jobs (Optional[int]): Number of worker processes. Default: Number of CPUs
+        chunksize (int): Number of sources to send to a worker at once.
+            Increase this for many small documents so the communication with
+            the workers doesn't dominate. Default: 1
+        **kwargs: Passed on to HocrValidator
+    """
+
+    def __init__(self, profile='standard', jobs=None, chunksize=1, **kwargs):
+        import multiprocessing
+        self.profile = profile
+        self.jobs = jobs or multiprocessing.cpu_count()
+        self.chunksize = chunksize
+        self.kwargs = kwargs
+
+    def validate(self, sources, **kwargs):
+        """
+        Validate hocr documents in parallel.
+
+        Args:
+            sources (List[str]): Filenames of the documents. '-' to read
+                from STDIN is only supported with a single job.
+            **kwargs: Passed on to HocrValidator.validate
+
+        Returns:
+            Iterator over the reports, in the order of `sources`
+        """
+        sources = list(sources)
+        jobs = min(self.jobs, len(sources))
+        if jobs <= 1:
+            validator = HocrValidator(self.profile, **self.kwargs)
+            for source in sources:
+                yield validator.validate(source, **kwargs)
+            return
+        import multiprocessing
+        pool = multiprocessing.Pool(jobs, _init_worker,
+                                    (self.profile, self.kwargs))
+        try:
+            for report in pool.imap(_validate,
+                                    [(source, kwargs) for source in sources],
+                                    self.chunksize):
+                yield report
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
@@ -0,0 +1,432 @@
+# -*- coding: utf-8 -*-
+"""
+Validation daemon that keeps validators warm, and a thin client for it.
+
+The server speaks HTTP on localhost or on a Unix socket:
+
+    POST /validate?profile=standard&filename=page.hocr   raw hOCR as body
+    GET  /validate?path=/abs/path/page.hocr&profile=standard
+
+Both return the report as JSON, see `HocrValidator.Report.as_dict`.
+Further query parameters are `parse_strict` and `stream`, set to 1 to
+enable, `aggregate`, the number of lines to keep of every kind of issue,
+and the options of the spec `implicit_capabilities`, `skip_check` and
+`add_check`, repeated for every value, e.g. `skip_check=classes&
+skip_check=metadata`. Spec options of a request replace those the server
+was started with.
+"""
+
+from builtins import object
+
+import io
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+from argparse import ArgumentParser
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+
+from .cli import add_validation_arguments
+from .sources import iter_sources
+from .spec import HocrSpec
+from .validate import HocrValidator
+
+try:
+    from urllib.parse import parse_qs, urlencode, urlparse
+except ImportError:
+    from urllib import urlencode
+    from urlparse import parse_qs, urlparse
+
+# Options of the spec a request can set, see HocrSpecProfile
+SPEC_OPTIONS = ('implicit_capabilities', 'skip_check', 'add_check')
+
+# Warm validators of a worker process by profile and spec options, see
+# _init_worker
+_validators = {}
+_validator_kwargs = {}
+
+
+def _init_worker(kwargs):
+    global _validator_kwargs
+    _validator_kwargs = kwargs
+
+
+def _validate(args):
+    profile, options, source, kwargs = args
+    validator = _validators.get((profile, options))
+    if validator is None:
+        validator_kwargs = dict(_validator_kwargs)
+        validator_kwargs.update((name, list(values))
+                                for name, values in options)
+        validator = _validators[profile, options] = HocrValidator(
+            profile, **validator_kwargs)
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    return validator.validate(source, **kwargs).as_dict()
+
+
+class HocrValidationServer(object):
+    """
+    Validates documents sent over HTTP in a pool of worker processes.
+
+    Every worker keeps one HocrValidator per profile and spec options it
+    has been asked for, so requests pay neither for interpreter startup nor
+    for building the spec. Requests are accepted in threads and validated
+    by the pool.
+
+    Args:
+        socket_path (Optional[str]): Listen on this Unix socket
+        host (str): Otherwise listen on this host. Default: 127.0.0.1
+        port (int): and this port. Default: 8405
+        jobs (Optional[int]): Number of worker processes. Default: Number of CPUs
+        **kwargs: Passed on to HocrValidator, e.g. `cache` or the spec
+            options used by requests that don't set them, `skip_check`,
+            `implicit_capabilities` or `add_check`
+    """
+
+    def __init__(self, socket_path=None, host='127.0.0.1', port=8405,
+                 jobs=None, **kwargs):
+        self.socket_path = socket_path
+        self.host = host
+        self.port = port
+        self.jobs = jobs or multiprocessing.cpu_count()
+        self.kwargs = kwargs
+        self.pool = None
+        self.httpd = None
+
+    def validate(self, profile, source, options=None, **kwargs):
+        """
+        Validate `source`, a path or the document as bytes, in the pool.
+
+        Args:
+            options (Optional[Dict[str,List[str]]]): Spec options, see
+                SPEC_OPTIONS, replacing those of the server
+            **kwargs: Passed on to HocrValidator.validate
+
+        Returns:
+            The report as dict
+        """
+        if profile not in HocrSpec.profiles:
+            raise ValueError("No such profile: %s" % profile)
+        options = options or {}
+        unknown = set(options) - set(SPEC_OPTIONS)
+        if unknown:
+            raise ValueError("No such options: %s" %
+                             ', '.join(sorted(unknown)))
+        # Hashable and independent of the order of the values, to look up
+        # the warm validator
+        options = tuple((name, tuple(sorted(set(options[name]))))
+                        for name in SPEC_OPTIONS if name in options)
+        return self.pool.apply(_validate,
+                               ((profile, options, source, kwargs),))
+
+    def serve_forever(self):
+        self.pool = multiprocessing.Pool(self.jobs, _init_worker,
+                                         (self.kwargs,))
+        if self.socket_path:
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            self.httpd = _ThreadingUnixHTTPServer(self.socket_path,
+                                                  _RequestHandler)
+        else:
+            self.httpd = _ThreadingHTTPServer((self.host, self.port),
+                                              _RequestHandler)
+        self.httpd.validation_server = self
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        if self.httpd:
+            self.httpd.server_close()
+            if self.socket_path and os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+        if self.pool:
+            self.pool.terminate()
+            self.pool.join()
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _ThreadingUnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+
+    # Keep connections of clients validating many documents open
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path != '/validate' or 'path' not in query:
+            return self.__reply(404, {'error': "GET /validate?path=..."})
+        self.__validate(query, query['path'][0])
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/validate':
+            return self.__reply(404, {'error': "POST /validate"})
+        length = int(self.headers.get('Content-Length', 0))
+        self.__validate(parse_qs(url.query), self.rfile.read(length))
+
+    def __validate(self, query, source):
+        def param(name, default=None):
+            return query[name][0] if name in query else default
+        kwargs = {
+            'parse_strict': param('parse_strict') == '1',
+            'streaming': param('stream') == '1',
+            'filename': param('filename', param('path', '-')),
+        }
+        options = dict((name, query[name]) for name in SPEC_OPTIONS
+                       if name in query)
+        try:
+            if 'aggregate' in query:
+                kwargs['aggregate'] = int(param('aggregate'))
+            report = self.server.validation_server.validate(
+                param('profile', 'standard'), source, options, **kwargs)
+        except Exception as e:
+            return self.__reply(400, {'error': str(e)})
+        self.__reply(200, report)
+
+    def __reply(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # Unix sockets have no client address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _UnixHTTPConnection(HTTPConnection):
+
+    def __init__(self, socket_path):
+        HTTPConnection.__init__(self, 'localhost')
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+class HocrValidationClient(object):
+    """
+    Client of a HocrValidationServer.
+
+    Args:
+        socket_path (Optional[str]): Connect to this Unix socket
+        host (str): Otherwise connect to this host. Default: 127.0.0.1
+        port (int): and this port. Default: 8405
+    """
+
+    def __init__(self, socket_path=None, host='127.0.0.1', port=8405):
+        if socket_path:
+            self.connection = _UnixHTTPConnection(socket_path)
+        else:
+            self.connection = HTTPConnection(host, port)
+
+    def validate(self, source, profile='standard', parse_strict=False,
+                 filename=None, streaming=False, upload=False, aggregate=None,
+                 implicit_capabilities=None, skip_check=None, add_check=None):
+        """
+        Validate a document on the server.
+
+        Args:
+            source (Union[str,HocrArchiveMember]): A filename, '-' to send
+                STDIN or a document in an archive, whose content is sent
+            upload (bool): Whether to send the content of the file rather
+                than its path, e.g. if the server can't access it.
+                Default: False
+            aggregate (Optional[int]): Group the issues by kind, keeping
+                the lines of this many occurrences per group
+            implicit_capabilities (Optional[List[str]]): Capabilities to
+                assume, replacing those of the server if set
+            skip_check (Optional[List[str]]): Checks to skip, likewise
+            add_check (Optional[List[str]]): Optional checks to run, likewise
+
+        Returns:
+            HocrValidator.Report
+        """
+        query = {'profile': profile}
+        if parse_strict:
+            query['parse_strict'] = '1'
+        if streaming:
+            query['stream'] = '1'
+        if aggregate is not None:
+            query['aggregate'] = str(aggregate)
+        for name, values in (('implicit_capabilities', implicit_capabilities),
+                             ('skip_check', skip_check),
+                             ('add_check', add_check)):
+            if values:
+                query[name] = list(values)
+        query['filename'] = filename or str(source)
+        body = None
+        if not isinstance(source, str):
+            with source.open() as f:
+                body = f.read()
+        elif source == '-':
+            body = getattr(sys.stdin, 'buffer', sys.stdin).read()
+        elif upload:
+            with open(source, 'rb') as f:
+                body = f.read()
+        if body is not None:
+            self.connection.request(
+                'POST', '/validate?' + urlencode(query, doseq=True), body)
+        else:
+            query['path'] = os.path.abspath(source)
+            self.connection.request(
+                'GET', '/validate?' + urlencode(query, doseq=True))
+        response = self.connection.getresponse()
+        result = json.loads(response.read().decode('utf-8'))
+        if response.status != 200:
+            raise ValueError(result['error'])
+        return HocrValidator.Report.from_dict(result)
+
+
+def _add_endpoint_arguments(parser):
+    parser.add_argument(
+        '--socket',
+        metavar='PATH',
+        help="Unix socket of the server")
+    parser.add_argument(
+        '--host',
+        default='127.0.0.1',
+        help="Host of the server if not using a socket. Default: 127.0.0.1")
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=8405,
+        help="Port of the server if not using a socket. Default: 8405")
+
+
+serve_parser = ArgumentParser(
+    prog='hocr-spec serve',
+    description="Validate documents sent by 'hocr-spec client' or over HTTP")
+_add_endpoint_arguments(serve_parser)
+serve_parser.add_argument(
+    '--jobs',
+    '-j',
+    type=int,
+    metavar='N',
+    help="Number of worker processes. Default: Number of CPUs")
+serve_parser.add_argument(
+    '--implicit_capabilities',
+    '-C',
+    action='append',
+    metavar='CAPABILITY',
+    choices=HocrSpec.list('capabilities'),
+    help="Enable this capability for requests that don't set capabilities. "
+         "Use '*' to enable all capabilities.")
+serve_parser.add_argument(
+    '--skip-check',
+    '-X',
+    action='append',
+    choices=HocrSpec.checks,
+    help="Skip one check for requests that don't set checks to skip")
+serve_parser.add_argument(
+    '--add-check',
+    '-A',
+    action='append',
+    choices=HocrSpec.optional_checks,
+    help="Run one optional check as well for requests that don't set "
+         "optional checks. geometry requires NumPy")
+serve_parser.add_argument(
+    '--cache-dir',
+    metavar='DIR',
+    help="Reuse the reports of unchanged documents from earlier runs, "
+         "stored in this directory")
+
+client_parser = ArgumentParser(
+    prog='hocr-spec client',
+    description="Validate documents with a running 'hocr-spec serve'")
+_add_endpoint_arguments(client_parser)
+client_parser.add_argument(
+    '--format',
+    '-f',
+    choices=HocrValidator.formats,
+    default=HocrValidator.formats[0],
+    help="Report format")
+add_validation_arguments(client_parser)
+client_parser.add_argument(
+    '--upload',
+    action='store_true',
+    help="Send the content of the files instead of their paths")
+client_parser.add_argument(
+    '--silent',
+    '-s',
+    action='store_true',
+    help="Don't produce any output but signal success with exit code.")
+
+
+def serve_main(argv):
+    args = serve_parser.parse_args(argv)
+    cache = None
+    if args.cache_dir:
+        from .cache import HocrResultCache
+        cache = HocrResultCache(args.cache_dir)
+    server = HocrValidationServer(
+        socket_path=args.socket,
+        host=args.host,
+        port=args.port,
+        jobs=args.jobs,
+        cache=cache,
+        skip_check=args.skip_check,
+        add_check=args.add_check,
+        implicit_capabilities=args.implicit_capabilities)
+    # Clean up the socket and the workers when being stopped
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def client_main(argv):
+    args = client_parser.parse_args(argv)
+    client = HocrValidationClient(socket_path=args.socket, host=args.host,
+                                  port=args.port)
+    writer = None
+    if not args.silent and args.format != 'bool':
+        writer = HocrValidator.writer(args.format, sys.stdout)
+        writer.begin()
+    failed = 0
+    for source in iter_sources(args.sources, args.include):
+        try:
+            report = client.validate(
+                source,
+                profile=args.profile,
+                parse_strict=args.parse_strict,
+                filename=args.filename,
+                streaming=args.stream,
+                upload=args.upload,
+                aggregate=args.aggregate_lines if args.aggregate else None,
+                implicit_capabilities=args.implicit_capabilities,
+                skip_check=args.skip_check,
+                add_check=args.add_check)
+        except ValueError as e:
+            sys.stderr.write("%s: %s\n" % (source, e))
+            failed += 1
+            continue
+        failed += not report.is_valid()
+        if writer:
+            writer.write(report)
+        elif not args.silent:
+            print(report.format(args.format))
+    if writer:
+        writer.end()
+    sys.exit(0 if not failed else 1)
@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+
+from builtins import object
+
+import mmap
+import multiprocessing
+import re
+
+from lxml import etree
+
+from .incremental import HocrPageFragment
+from .stream import HocrStreamChecker
+
+PAGE_CLASS = re.compile(br'''(?<![\w-])ocr_page(?![\w-])''')
+START_TAG = re.compile(
+    br'''<([a-zA-Z][\w:.-]*)(?:\s[^>]*?)?\sclass\s*=\s*(?:"[^"]*"|'[^']*')''')
+SHARD_ATTRIBUTE = 'data-hocr-spec-shard'
+
+# The spec and checker of a worker process, see _init_worker
+_spec = None
+_checker = None
+
+
+def _init_worker(spec):
+    global _spec, _checker
+    _spec = spec
+    _checker = HocrStreamChecker(spec)
+
+
+def _check_pages(args):
+    path, pages, capabilities, encoding, parse_strict = args
+    parser = etree.HTMLParser(recover=parse_strict, encoding=encoding)
+    fragments = []
+    with open(path, 'rb') as f:
+        for start, end, sourceline, ancestors in pages:
+            f.seek(start)
+            fragment = HocrShardedValidation.check_page(
+                _spec, _checker, f.read(end - start), parser, capabilities,
+                ancestors)
+            items, detached = fragment.moved(sourceline)
+            fragments.append((items, fragment.classes, detached and dict(
+                (c, (el.tag, dict(el.attrib), el.sourceline))
+                for c, el in detached.items())))
+    return fragments
+
+
+class HocrShardError(Exception):
+    """
+    A page that can't be checked on its own, validation falls back to
+    streaming.
+    """
+
+
+class HocrShardedValidation(object):
+    """
+    Validate one document in a pool of worker processes, split at its
+    outermost 'ocr_page' elements.
+
+    The page boundaries are found in the bytes of the memory-mapped file,
+    by matching the start and end tags of the pages. Workers read, parse
+    and check batches of pages on their own, with the ancestors and
+    capabilities of the pages recreated around them, and return the report
+    items, classes and first descendants of every page, moved to the lines
+    of the page in the document.
+
+    What is left of the document without the pages is parsed once, with an
+    empty element in place of every page, and checked with the summaries of
+    the pages like HocrStreamChecker does once it has cleared all pages.
+    The report is the same as that of streaming validation.
+
+    Requires the pages to be balanced elements. If they are not, e.g. if
+    an end tag is missing, validation falls back to streaming in a single
+    process.
+
+    Args:
+        spec (HocrSpec): The spec to check against
+        jobs (Optional[int]): Number of worker processes. Default: Number
+            of CPUs
+    """
+
+    def __init__(self, spec, jobs=None):
+        self.spec = spec
+        self.jobs = jobs or multiprocessing.cpu_count()
+
+    @staticmethod
+    def find_pages(data):
+        """
+        Byte ranges of the outermost 'ocr_page' elements.
+
+        Returns:
+            List of (start, end) tuples or None if an end tag is missing
+        """
+        pages = []
+        end = 0
+        pos = 0
+        while True:
+            match = PAGE_CLASS.search(data, pos)
+            if match is None:
+                return pages
+            pos = match.end()
+            start = data.rfind(b'<', 0, match.start())
+            tag = START_TAG.match(data, start) if start >= 0 else None
+            if tag is None or tag.end() < match.end() or start < end:
+                # Not in a class attribute or within the last page
+                continue
+            name = tag.group(1)
+            tags = re.compile(br'<!--.*?-->|<(/?)' + re.escape(name) +
+                              br'''(?=[\s/>])(?:"[^"]*"|'[^']*'|[^>"'])*>''',
+                              re.I | re.S)
+            depth = 0
+            for m in tags.finditer(data, start):
+                if m.group(1) is None:
+                    continue
+                elif m.group(1):
+                    depth -= 1
+                elif not m.group(0).endswith(b'/>'):
+                    depth += 1
+                if depth == 0:
+                    end = m.end()
+                    break
+            else:
+                return None
+            pages.append((start, end))
+            pos = end
+
+    @staticmethod
+    def check_page(spec, checker, data, parser, capabilities, ancestors):
+        """
+        Check the page in `data` with its ancestors recreated around it.
+
+        Returns:
+            HocrPageFragment
+        """
+        page = next((el for el in etree.fromstring(data, parser).iter('*')
+                     if 'ocr_page' in (el.get('class') or '').split()), None)
+        if page is None:
+            raise HocrShardError('No ocr_page in the shard')
+        parent = root = None
+        for tag, attrib, sourceline in ancestors:
+            el = etree.Element(tag, attrib) if parent is None \
+                else etree.SubElement(parent, tag, attrib)
+            el.sourceline = sourceline
+            if parent is None:
+                root = el
+                if capabilities is not None:
+                    head = etree.SubElement(root, 'head')
+                    etree.SubElement(head, 'meta', {
+                        'name': 'ocr-capabilities', 'content': capabilities})
+            parent = el
+        if parent is not None:
+            parent.append(page)
+        else:
+            root = page
+        from .validate import HocrValidator
+        report = HocrValidator.Report(None)
+        context = spec.context(root)
+        sourceline = page.sourceline
+        # The tree is freed as a whole, clearing the page would only cost
+        page_context = checker.check_subtree(report, context, page)
+        classes = frozenset()
+        if 'classes' in spec.checks:
+            classes = frozenset(c for el, names in page_context.index.elements
+                                for c in names)
+        return HocrPageFragment(sourceline, report.items, classes,
+                                context.detached.get(page))
+
+    def validate(self, path, report, parse_strict=False):
+        """
+        Validate the document at `path` into `report`.
+
+        Returns:
+            Whether the document could be split, if not `report` is
+            unchanged
+        """
+        with open(path, 'rb') as f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                return False
+            try:
+                pages = self.find_pages(data)
+                if not pages:
+                    return False
+                stub, page_lines = self.__stub(data, pages)
+            finally:
+                data.close()
+        parser = etree.HTMLParser(recover=parse_strict)
+        try:
+            root = etree.fromstring(stub, parser)
+        except etree.XMLSyntaxError:
+            return False
+        elements = self.__placeholders(root, len(pages))
+        if elements is None:
+            return False
+        capabilities = root.xpath(
+            '//meta[@name="ocr-capabilities"]/@content')
+        capabilities = capabilities[0] if capabilities else None
+        encoding = root.getroottree().docinfo.encoding
+        tasks = []
+        for (start, end), sourceline, el in zip(pages, page_lines, elements):
+            ancestors = [(a.tag, dict(a.attrib), a.sourceline)
+                         for a in el.iterancestors()][::-1]
+            tasks.append((start, end, sourceline, ancestors))
+        size = max(1, len(tasks) // (self.jobs * 4))
+        batches = [(path, tasks[i:i + size], capabilities, encoding,
+                    parse_strict) for i in range(0, len(tasks), size)]
+        pool = multiprocessing.Pool(min(self.jobs, len(batches)),
+                                    _init_worker, (self.spec,))
+        try:
+            results = []
+            for fragments in pool.imap(_check_pages, batches):
+                results.extend(fragments)
+            pool.close()
+        except (etree.XMLSyntaxError, HocrShardError):
+            # A page that doesn't parse on its own
+            return False
+        finally:
+            pool.terminate()
+            pool.join()
+        if len(results) != len(elements):
+            return False
+        context = self.spec.context(root, timings=report.timings)
+        for el, (items, classes, detached) in zip(elements, results):
+            report.extend(items)
+            context.found_classes.update(classes)
+            if detached is not None:
+                context.detached[el] = self.__detached(detached)
+            if context.timings is not None:
+                context.timings.count('pages')
+        HocrStreamChecker(self.spec).check_document(report, context, root)
+        return True
+
+    @staticmethod
+    def __stub(data, pages):
+        """
+        The document with every page replaced by an empty element marked
+        with SHARD_ATTRIBUTE. The placeholders keep the line breaks of the
+        pages, so the rest of the document stays on its lines.
+
+        Returns:
+            Tuple of the document and the line of every page
+        """
+        parts = [data[:pages[0][0]]]
+        lines = 1 + parts[0].count(b'\n')
+        page_lines = []
+        for i, (start, end) in enumerate(pages):
+            tag = START_TAG.match(data, start).group(1)
+            page_lines.append(lines)
+            count = data[start:end].count(b'\n')
+            parts.append(b'<%s %s="%d">%s</%s>' % (
+                tag, SHARD_ATTRIBUTE.encode(), i, b'\n' * count, tag))
+            rest = data[end:pages[i + 1][0] if i + 1 < len(pages)
+                        else len(data)]
+            parts.append(rest)
+            lines += count + rest.count(b'\n')
+        return b''.join(parts), page_lines
+
+    @staticmethod
+    def __placeholders(root, n):
+        """
+        The unmarked placeholders of the pages in the stub or None if the
+        stub was parsed into another structure.
+        """
+        elements = root.xpath('//*[@%s]' % SHARD_ATTRIBUTE)
+        if [int(el.get(SHARD_ATTRIBUTE)) for el in elements] != list(range(n)):
+            return None
+        for el in elements:
+            del el.attrib[SHARD_ATTRIBUTE]
+            el.text = None
+        return elements
+
+    @staticmethod
+    def __detached(detached):
+        summary = {}
+        for c, (tag, attrib, sourceline) in detached.items():
+            summary[c] = etree.Element(tag, attrib)
+            summary[c].sourceline = sourceline
+        return summary
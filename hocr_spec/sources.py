@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+from builtins import object
+
+import fnmatch
+import os
+import threading
+
+# Patterns of the files checked in directories and archives by default
+INCLUDE = ['*.hocr', '*.html', '*.htm', '*.xhtml']
+ZIP_SUFFIXES = ('.zip',)
+TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz',
+                '.txz')
+
+# Archives opened by the current thread, see HocrArchiveMember.open
+_archives = threading.local()
+
+
+class HocrArchiveMember(object):
+    """
+    A document in a zip or tar archive, named `archive.zip!/member` in
+    reports.
+
+    Members are read from the archive while parsing them, without
+    extracting them. They can be sent to other processes, which open the
+    archive themselves. Every thread keeps the archive it read last open, so
+    reading the members of one archive in order reads it only once, even if
+    it is compressed.
+
+    Args:
+        archive (str): Path of the archive
+        name (str): Name of the member in the archive
+        info (Optional[tarfile.TarInfo]): Header of a tar member, so it can
+            be read without looking it up in the archive
+    """
+
+    def __init__(self, archive, name, info=None):
+        self.archive = archive
+        self.name = name
+        self.info = info
+
+    def __str__(self):
+        return '%s!/%s' % (self.archive, self.name)
+
+    def __repr__(self):
+        return 'HocrArchiveMember(%r, %r)' % (self.archive, self.name)
+
+    def open(self):
+        """
+        Open the member for reading as a binary file object.
+        """
+        archive = getattr(_archives, 'archive', None)
+        if archive is None or _archives.path != self.archive:
+            if archive is not None:
+                archive.close()
+            _archives.archive = None
+            if self.info is None:
+                import zipfile
+                archive = zipfile.ZipFile(self.archive)
+            else:
+                import tarfile
+                archive = tarfile.open(self.archive)
+            _archives.archive, _archives.path = archive, self.archive
+        if self.info is None:
+            return archive.open(self.name)
+        return archive.extractfile(self.info)
+
+
+def is_archive(path):
+    """
+    Whether `path` is named like a zip or tar archive.
+    """
+    name = path.lower()
+    return name.endswith(ZIP_SUFFIXES) or name.endswith(TAR_SUFFIXES)
+
+
+def _included(name, include):
+    return any(fnmatch.fnmatch(name, pattern) for pattern in include)
+
+
+def iter_archive(path, include=None):
+    """
+    The documents in the zip or tar archive at `path` whose names match one
+    of the `include` patterns, in the order of the archive.
+
+    Returns:
+        Iterator over HocrArchiveMember
+    """
+    include = INCLUDE if include is None else include
+    if path.lower().endswith(ZIP_SUFFIXES):
+        import zipfile
+        with zipfile.ZipFile(path) as archive:
+            names = [info.filename for info in archive.infolist()
+                     if not info.is_dir()]
+        for name in names:
+            if _included(name, include):
+                yield HocrArchiveMember(path, name)
+        return
+    # Reads compressed archives once, the members are opened by offset
+    import tarfile
+    with tarfile.open(path) as archive:
+        for info in archive:
+            if info.isfile() and _included(info.name, include):
+                yield HocrArchiveMember(path, info.name, info)
+
+
+def iter_sources(paths, include=None):
+    """
+    Expand directories and archives among `paths` into the documents they
+    contain.
+
+    Directories are walked recursively in sorted order, archives found
+    there are expanded as well. Other paths, including '-', are passed
+    through as they are.
+
+    Args:
+        paths (Iterable[str]): Paths of documents, directories or archives
+        include (Optional[List[str]]): Patterns of the names of documents to
+            check in directories and archives, matched against their path
+            relative to the directory or archive. Default: INCLUDE
+
+    Returns:
+        Iterator over filenames and HocrArchiveMember
+    """
+    include = INCLUDE if include is None else include
+    for path in paths:
+        if path != '-' and os.path.isdir(path):
+            for directory, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    filename = os.path.join(directory, name)
+                    if is_archive(name):
+                        for member in iter_archive(filename, include):
+                            yield member
+                    elif _included(os.path.relpath(filename, path), include):
+                        yield filename
+        elif path != '-' and is_archive(path) and os.path.isfile(path):
+            for member in iter_archive(path, include):
+                yield member
+        else:
+            yield path
@@ -1,11 +1,27 @@
 # -*- coding: utf-8 -*-
 
 from builtins import str
-from builtins import map
 from builtins import object
 
 import re
 
+try:
+    from types import MappingProxyType
+except ImportError:
+    MappingProxyType = dict
+
+from .parser import HocrPropertyParser
+from .timings import timer
+
+
+class HocrSourceLine(int):
+    """
+    Line number in the arguments of a report message, marked as such so the
+    message can be moved along with the lines it refers to, see
+    HocrPageCache.
+    """
+    __slots__ = ()
+
 
 class HocrSpecProperties(object):
 
@@ -30,6 +46,8 @@ class HocrSpecProperties(object):
             split_pattern (List[str]): List of regexes to split list values.
                 Specify multiple regexes for multi-dimensional. Default: ['\s+']
             range (Optional[List[int]]): Minimum and maximum value of property
+            width (Optional[int]): Number of values of a list property that
+                always has the same number of values
         """
 
         def __init__(self, name, type,
@@ -38,32 +56,34 @@ class HocrSpecProperties(object):
                      not_checked=False,
                      required_properties=None,
                      range=None,
-                     required_capabilities=[],
-                     split_pattern=[r"\s+"],
-                     list=False):
+                     required_capabilities=None,
+                     split_pattern=None,
+                     list=False,
+                     width=None):
             self.name = name
             self.type = type
             self.deprecated = deprecated
             self.obsolete = obsolete
             self.not_checked = not_checked
             self.required_properties = required_properties
-            self.required_capabilities = required_capabilities
+            self.required_capabilities = required_capabilities or []
             self.range = range
-            self.split_pattern = split_pattern
+            self.split_pattern = split_pattern or [r"\s+"]
             self.list = list
+            self.width = width
 
         def __repr__(self):
             return '<* title="%s">' % self.name
 
     # General Properties
-    bbox = HocrSpecProperty('bbox', int, list=True)
+    bbox = HocrSpecProperty('bbox', int, list=True, width=4)
     textangle = HocrSpecProperty('textangle', float)
     poly = HocrSpecProperty('poly', int, list=True,
                             required_capabilities=['ocrp_poly'])
     order = HocrSpecProperty('order', int)
     presence = HocrSpecProperty('presence', str)
     cflow = HocrSpecProperty('cflow', str)
-    baseline = HocrSpecProperty('baseline', float, list=True)
+    baseline = HocrSpecProperty('baseline', float, list=True, width=2)
 
     # Recommended Properties for typesetting elements
     image = HocrSpecProperty('image', str)
@@ -72,7 +92,7 @@ class HocrSpecProperties(object):
     lpageno = HocrSpecProperty('lpageno', int)
 
     # Optional Properties for typesetting elements
-    scan_res = HocrSpecProperty('scan_res', int, list=True)
+    scan_res = HocrSpecProperty('scan_res', int, list=True, width=2)
     x_scanner = HocrSpecProperty('x_scanner', str)
     x_source = HocrSpecProperty('x_source', str)
     hardbreak = HocrSpecProperty('hardbreak', int)
@@ -110,9 +130,9 @@ class HocrSpecAttributes(object):
         Note: 'title', 'class', 'name' and 'content' are handled elsewhere,
         this is for attributes that require special capabilities.
         """
-        def __init__(self, name, required_capabilities=[]):
+        def __init__(self, name, required_capabilities=None):
             self.name = name
-            self.required_capabilities = required_capabilities
+            self.required_capabilities = required_capabilities or []
 
     attr_lang = HocrSpecAttribute('lang', required_capabilities=['ocrp_lang'])
     attr_dir = HocrSpecAttribute('dir', required_capabilities=['ocrp_dir'])
@@ -140,11 +160,11 @@ class HocrSpecMetadataFields(object):
         """
         Definition of hOCR metadata.
         """
-        def __init__(self, name, required=False, recommended=False, known=[]):
+        def __init__(self, name, required=False, recommended=False, known=None):
             self.name = name
             self.required = required
             self.recommended = recommended
-            self.known = known
+            self.known = known or []
 
     ocr_system = HocrSpecMetadataField(
         'ocr-system',
@@ -194,25 +214,25 @@ class HocrSpecClasses(object):
                      deprecated=False,
                      obsolete=False,
                      not_checked=False,
-                     tagnames=[],
+                     tagnames=None,
                      must_exist=False,
-                     must_not_contain=[],
-                     required_attrib=[],
-                     required_capabilities=[],
-                     required_properties=[],
-                     one_ancestor=[],
+                     must_not_contain=None,
+                     required_attrib=None,
+                     required_capabilities=None,
+                     required_properties=None,
+                     one_ancestor=None,
                      allowed_descendants=None):
             self.name = name
             self.deprecated = deprecated
             self.obsolete = obsolete
             self.not_checked = not_checked
-            self.tagnames = tagnames
+            self.tagnames = tagnames or []
             self.must_exist = must_exist
-            self.must_not_contain = must_not_contain
-            self.required_attrib = required_attrib
-            self.required_properties = required_properties
-            self.required_capabilities = [self.name] + required_capabilities
-            self.one_ancestor = one_ancestor
+            self.must_not_contain = must_not_contain or []
+            self.required_attrib = required_attrib or []
+            self.required_properties = required_properties or []
+            self.required_capabilities = [self.name] + (required_capabilities or [])
+            self.one_ancestor = one_ancestor or []
             self.allowed_descendants = allowed_descendants
 
         def __repr__(self):
@@ -297,14 +317,30 @@ class HocrSpecProfile(object):
         implicit_capabilities (List[str]): Assume these capabilities were
             specified in <meta name=ocr-capabilities'>
         skip_check (List[str]): Specify a list of checks to skip.
+        add_check (List[str]): Specify a list of optional checks to run as
+            well, see HocrSpec.optional_checks
     """
 
     def __init__(self, version='1.1', description=None,
-                 implicit_capabilities=[], skip_check=[]):
+                 implicit_capabilities=None, skip_check=None, add_check=None):
         self.version = version
         self.description = description
-        self.implicit_capabilities = implicit_capabilities
-        self.skip_check = skip_check
+        self.implicit_capabilities = list(implicit_capabilities or [])
+        self.skip_check = list(skip_check or [])
+        self.add_check = list(add_check or [])
+
+    def copy(self, **kwargs):
+        """
+        A copy of the profile with the options in `kwargs` that are set
+        replaced.
+        """
+        profile = HocrSpecProfile(self.version, self.description,
+                                  self.implicit_capabilities, self.skip_check,
+                                  self.add_check)
+        for arg in kwargs:
+            if kwargs[arg]:
+                setattr(profile, arg, kwargs[arg])
+        return profile
 
 
 class HocrSpec(object):
@@ -316,6 +352,13 @@ class HocrSpec(object):
         - attributes
         - properties
         - classes
+
+    Optional checks, enabled with `add_check`:
+        - geometry
+
+    An instance is not modified by checking, so it can be used by several
+    threads at once. Options passed on construction apply to this instance
+    only.
     """
     profiles = {
         'standard': HocrSpecProfile(
@@ -326,75 +369,128 @@ class HocrSpec(object):
             skip_check=['attribute']),
     }
     checks = ['attributes', 'classes', 'metadata', 'properties']
+    # Checks that only run if enabled with `add_check`, after the others, so
+    # they can reuse the properties parsed by check_properties
+    optional_checks = ['geometry']
+    # Number of title fragments to memoize when parsing properties, 0 to
+    # disable. Pays off for documents with many repeated fragments.
+    property_cache_size = 0
+    # Fraction of the smaller of two sibling boxes that may be covered by
+    # the other one before the geometry check warns
+    overlap_threshold = 0.5
+    # Whether check_classes uses checkers compiled for the profile, see
+    # HocrClassCompiler, rather than interpreting the class specs
+    compile_checks = True
 
     def __init__(self, profile='standard', **kwargs):
-        self.profile = self.__class__.profiles[profile]
-        for arg in kwargs:
-            if kwargs[arg]:
-                setattr(self.profile, arg, kwargs[arg])
-        self.checks = []
-        for check in self.__class__.checks:
-            if not check in self.profile.skip_check:
-                self.checks.append(check)
+        self.__args = (profile, kwargs)
+        # Options apply to this instance only, the shared profiles are
+        # never modified
+        self.profile = self.__class__.profiles[profile].copy(**kwargs)
+        # The spec compiled into read-only lookup tables, so checks need no
+        # reflection and the tables can be shared between threads
+        self.checks = tuple(
+            check for check in self.__class__.checks + [
+                check for check in self.__class__.optional_checks
+                if check in self.profile.add_check]
+            if not check in self.profile.skip_check)
+        self.check_functions = tuple(
+            (check, getattr(self.__class__, 'check_%s' % check))
+            for check in self.checks)
+        # Tables that don't depend on the profile are built once per class,
+        # when its first instance is created
+        tables = _tables.get(self.__class__)
+        if tables is None:
+            tables = _tables[self.__class__] = self.__tables()
+        self.__dict__.update(tables)
+        self.property_parser = HocrPropertyParser(
+            HocrSpecProperties, cache_size=self.property_cache_size)
+
+    @classmethod
+    def __tables(cls):
+        tables = {}
+        tables['class_specs'] = class_specs = MappingProxyType(dict(
+            (class_spec.name, class_spec)
+            for class_spec in cls.__specs(HocrSpecClasses, 'ocr')))
+        tables['must_exist_classes'] = tuple(
+            class_specs[name] for name in sorted(class_specs)
+            if class_specs[name].must_exist)
+        tables['property_specs'] = MappingProxyType(dict(
+            (k, getattr(HocrSpecProperties, k))
+            for k in dir(HocrSpecProperties)
+            if isinstance(getattr(HocrSpecProperties, k),
+                          HocrSpecProperties.HocrSpecProperty)))
+        tables['attribute_specs'] = cls.__specs(HocrSpecAttributes, 'attr_')
+        tables['metadata_specs'] = cls.__specs(HocrSpecMetadataFields, 'ocr')
+        tables['metadata_fields'] = frozenset(
+            k for k in dir(HocrSpecMetadataFields)
+            if k.startswith('ocr') and getattr(HocrSpecMetadataFields, k))
+        # Classes the structural index must keep track of
+        tables['ancestor_classes'] = tuple(sorted(set(
+            c for class_spec in class_specs.values()
+            for c in class_spec.one_ancestor)))
+        tables['descendant_classes'] = tuple(sorted(set(
+            c for class_spec in class_specs.values()
+            for c in class_spec.must_not_contain)))
+        return tables
+
+    def __reduce__(self):
+        # Rebuild from the arguments rather than copying the tables, so the
+        # spec objects in them stay the module-level ones
+        profile, kwargs = self.__args
+        return (_build_spec, (self.__class__, profile, kwargs))
+
+    @staticmethod
+    def __specs(holder, prefix):
+        """
+        Specs defined on `holder` under names starting with `prefix`.
+        """
+        return tuple(getattr(holder, k) for k in dir(holder)
+                     if k.startswith(prefix))
 
     #=========================================================================
     #
     # Private methods
     #
     #=========================================================================
-    def __elem_name(self, el):
-        """
-        Stringify an element with its attributes
-        """
-        attrib = " ".join(['%s="%s"'%(k, el.attrib[k]) for k in el.attrib])
-        #  attrib = str(el.attrib).replace(': ', ':').replace(', ', ',')
-        #  attrib = attrib.replace("{'", '{').replace("':'", ":'").replace("'}", '}')
-        return "<%s %s>" %(el.tag, attrib)
-
-    def __get_capabilities(self, root):
+    def __prop_name(self, el, prop_spec):
         """
-        List all capabilities of the document.
+        Stringify a property of an element
         """
-        try:
-            caps = root.xpath('//meta[@name="ocr-capabilities"]/@content')[0]
-            return re.split(r'\s+', caps)
-        except IndexError as e: return []
+        return str(prop_spec).replace('*', el.tag)
 
-    def __has_capability(self, report, el, cap):
+    def __has_capability(self, report, context, el, cap):
         """
         Check whether the document of `el` has capability `cap`.
         """
-        if '*' in self.profile.implicit_capabilities:
-            return True
-        if not cap in self.__get_capabilities(el) + self.profile.implicit_capabilities:
+        if not context.has_capability(cap):
             report.add('ERROR',
                        el.sourceline,
-                       '%s: Requires the "%s" capability but it is not specified'
-                       % (self.__elem_name(el), cap))
+                       '%s: Requires the "%s" capability but it is not specified',
+                       el, cap, rule='capability')
 
-    def __not_contains_class(self, report, el, contains_classes):
+    def __not_contains_class(self, report, index, el, contains_classes):
         """
         el must not contain any elements with a class from `contains_classes`
         """
         for contains_class in contains_classes:
-            contained = el.xpath(".//*[@class='%s']" % contains_class)
-            if len(contained) > 0:
+            contained = index.first_descendant(el, contains_class)
+            if contained is not None:
                 report.add('ERROR', el.sourceline,
-                           "%s must not contain '%s', but does contain %s in line %d" %
-                           (self.__elem_name(el),
-                            contains_class,
-                            self.__elem_name(contained[0]),
-                            contained[0].sourceline))
+                           "%s must not contain '%s', but does contain %s in line %d",
+                           el, contains_class, contained,
+                           HocrSourceLine(contained.sourceline),
+                           rule='must_not_contain')
 
-    def __exactly_one_ancestor_class(self, report, el, ancestor_class):
+    def __exactly_one_ancestor_class(self, report, index, el, ancestor_class):
         """
-        There must be exactly one element matching xpath.
+        There must be exactly one ancestor of class `ancestor_class`.
         """
-        nr = len(el.xpath("./ancestor::*[@class='%s']" % ancestor_class))
+        nr = index.count_ancestors(el, ancestor_class)
         if 1 != nr:
             report.add('ERROR', el.sourceline,
-                       "%s must be descendant of exactly one '%s', but found %d" %
-                       (self.__elem_name(el), ancestor_class, nr))
+                       "%s must be descendant of exactly one '%s', but found %d",
+                       el, ancestor_class, nr, rule='one_ancestor')
 
     def __has_tagname(self, report, el, tagnames):
         """
@@ -402,88 +498,93 @@ class HocrSpec(object):
         """
         if tagnames and not el.tag in tagnames:
             report.add('ERROR', el.sourceline,
-                       "%s must have a tag name from %s, not '%s'" %
-                       (self.__elem_name(el), tagnames, el.tag))
+                       "%s must have a tag name from %s, not '%s'",
+                       el, tagnames, el.tag, rule='tagname')
 
     def __has_attrib(self, report, el, attrib):
         """
         Elements el must have attribute attrib
         """
         if not attrib in el.attrib:
-            report.add('ERROR', el.sourceline, "%s must have attribute '%s'"
-                       % (self.__elem_name(el), attrib))
+            report.add('ERROR', el.sourceline, "%s must have attribute '%s'",
+                       el, attrib, rule='required_attrib')
 
-    def __has_property(self, report, el, prop):
+    def __has_property(self, report, context, el, prop):
         """
         Test whether an element el has a property prop in its title field
         """
         try:
-            props = self.parse_properties(el)
+            props = context.properties(el)
         except KeyError as e:
             report.add('ERROR', el.sourceline,
-                       '%s Cannot parse properties, missing atttribute: %s'
-                       % (self.__elem_name(el), e))
+                       '%s Cannot parse properties, missing atttribute: %s',
+                       el, str(e), rule='title_missing')
             return
         except Exception as e:
             report.add('ERROR', el.sourceline,
-                       'Error parsing properties for "%s" : %s'
-                       % (self.__elem_name(el), e))
+                       'Error parsing properties for "%s" : %s',
+                       el, str(e), rule='title_syntax')
             return
         if not prop in props:
             report.add('ERROR', el.sourceline,
-                       "Element %s must have title prop '%s'"
-                       % (self.__elem_name(el), prop))
+                       "Element %s must have title prop '%s'",
+                       el, prop, rule='required_property')
 
     def __check_version(self, report, el, spec):
         if spec.deprecated and self.profile.version >= spec.deprecated[0]:
             report.add(
                 'WARN', el.sourceline,
-                '%s %s has been deprecated since version %s: %s' %
-                (self.__elem_name(el), spec, spec.deprecated[0], spec.deprecated[1]))
+                '%s %s has been deprecated since version %s: %s',
+                el, spec, spec.deprecated[0], spec.deprecated[1],
+                rule='deprecated')
         if spec.obsolete and self.profile.version >= spec.obsolete[0]:
             report.add('ERROR', el.sourceline,
-                       '%s %s has been obsolete since version %s: %s' %
-                       (self.__elem_name(el), spec, spec.obsolete[0], spec.obsolete[1]))
+                       '%s %s has been obsolete since version %s: %s',
+                       el, spec, spec.obsolete[0], spec.obsolete[1],
+                       rule='obsolete')
 
-    def __check_against_ocr_class(self, report, el, c):
+    def __check_against_ocr_class(self, report, context, el, c):
         """
         check an element against its hOCR class.
         """
         if c.not_checked:
             return report.add("WARN", el.sourceline,
-                              "Validation of %s not tested in-depth" % c)
+                              "Validation of %s not tested in-depth", c,
+                              rule='not_checked')
         self.__check_version(report, el, c)
         self.__has_tagname(report, el, c.tagnames)
-        self.__not_contains_class(report, el, c.must_not_contain)
+        self.__not_contains_class(report, context.index, el, c.must_not_contain)
         for ancestor_class in c.one_ancestor:
-            self.__exactly_one_ancestor_class(report, el, ancestor_class)
+            self.__exactly_one_ancestor_class(report, context.index, el,
+                                              ancestor_class)
         for attrib in c.required_attrib:
             self.__has_attrib(report, el, attrib)
         for prop in c.required_properties:
-            self.__has_property(report, el, prop)
+            self.__has_property(report, context, el, prop)
         for cap in c.required_capabilities:
-            self.__has_capability(report, el, cap)
+            self.__has_capability(report, context, el, cap)
 
-    def __check_against_prop_spec(self, report, el, k, v):
+    def __check_against_prop_spec(self, report, context, el, k, v):
         """
         check a property value against its spec.
 
         Most structural validation must happen at parse-time to ensure
         syntactical correctness. Here we check value constraints.
         """
-        prop_spec = getattr(HocrSpecProperties, k)
-        prop_str = str(prop_spec).replace('*', el.tag)
+        prop_spec = self.property_specs[k]
         for cap in prop_spec.required_capabilities:
-            self.__has_capability(report, el, cap)
+            self.__has_capability(report, context, el, cap)
         if prop_spec.deprecated and self.profile.version >= prop_spec.deprecated[0]:
             report.add(
                 'WARN', el.sourceline,
-                '%s %s has been deprecated since version %s: %s' %
-                (self.__elem_name(el), prop_spec, prop_spec.deprecated[0], prop_spec.deprecated[1]))
+                '%s %s has been deprecated since version %s: %s',
+                el, prop_spec, prop_spec.deprecated[0], prop_spec.deprecated[1],
+                rule='deprecated')
         if prop_spec.obsolete and self.profile.version >= prop_spec.obsolete[0]:
             report.add('WARN', el.sourceline,
-                       '%s %s has been obsolete since version %s: %s' %
-                       (self.__elem_name(el), prop_spec, prop_spec.obsolete[0], prop_spec.obsolete[1]))
+                       '%s %s has been obsolete since version %s: %s',
+                       el, prop_spec, prop_spec.obsolete[0], prop_spec.obsolete[1],
+                       rule='obsolete')
         # primitives
         if not prop_spec.list:
             if prop_spec.range:
@@ -491,8 +592,9 @@ class HocrSpec(object):
                     report.add(
                         'ERROR',
                         el.sourceline,
-                        "%s : Value out of range: %d not in %s"
-                        % (prop_str, v, prop_spec.range))
+                        "%s : Value out of range: %d not in %s",
+                        self.__prop_name(el, prop_spec), v, prop_spec.range,
+                        rule='range')
             return
         # lists
         if prop_spec.range:
@@ -502,16 +604,18 @@ class HocrSpec(object):
                         report.add(
                             'ERROR',
                             el.sourceline,
-                            "%s : List value [%d] out of range (%d not in %s"
-                            % (prop_str, i, vv, prop_spec.range))
+                            "%s : List value [%d] out of range (%d not in %s",
+                            self.__prop_name(el, prop_spec), i, vv,
+                            prop_spec.range, rule='range')
                 if 2 == len(prop_spec.split_pattern):
                     for ii, vv in enumerate(v):
                         if not prop_spec.range[0] <= vv <= prop_spec.range[1]:
                             report.add(
                                 'ERROR',
                                 el.sourceline,
-                                "%s : List value [%d][%d] out of range (%d not in %s"
-                                % (prop_str, i, ii, vv, prop_spec.range))
+                                "%s : List value [%d][%d] out of range (%d not in %s",
+                                self.__prop_name(el, prop_spec), i, ii, vv,
+                                prop_spec.range, rule='range')
 
     #=========================================================================
     #
@@ -538,131 +642,247 @@ class HocrSpec(object):
     def parse_properties(self, title):
         """
         Parse the 'title' attribute of an element.
+
+        List values may be shared between calls and must not be modified.
         """
-        ret = {}
         # if it's an lxml node, take the 'title' attribute or die trying
         if hasattr(title, 'attrib'):
             title = title.attrib['title']
-        # Split on semicolon, optionally preceded and followed by whitespace
-        for kv in re.split(r'\s*;\s*', title):
-            # Split key and value at first whitespace
-            (k, v) = re.split(r'\s+', kv, 1)
-            # Make sure the property is from the list of known properties
-            try:
-                prop_spec = getattr(HocrSpecProperties, k)
-                # If the property is a list value, split the value at the
-                # property's 'split_pattern' and apply the type to its values
-                if prop_spec.list:
-                    if 1 == len(prop_spec.split_pattern):
-                        v = list(map(prop_spec.type,
-                                     re.split(prop_spec.split_pattern[0], v)))
-                    elif 2 == len(prop_spec.split_pattern):
-                        #  lambda vv: map(prop_spec.type, re.split(prop_spec.split_pattern[1], vv)),
-                        v = [list(map(prop_spec.type, re.split(prop_spec.split_pattern[1], vv))) for vv in re.split(prop_spec.split_pattern[0], v)]
-                # If the property is a scalar value, apply the type to the value
-                else:
-                    v = prop_spec.type(v)
-            except Exception as e:
-                raise type(e)(str(e) + ' (%s on "%s")' % (type(e).__name__, k))
-            ret[k] = v
-        return ret
+        return self.property_parser.parse(title)
 
-    def check_properties(self, report, root):
+    def extract_properties(self, root, props=None, context=None):
+        """
+        Extract the 'title' properties of all hOCR elements into columns,
+        one row per element, instead of a dict per element.
+
+        Args:
+            root (lxml.etree._Element): Element to extract properties of,
+                including itself
+            props (Optional[Iterable[str]]): Names of the properties to
+                extract, e.g. ['bbox', 'x_wconf']. Default: All
+
+        Returns:
+            HocrPropertyColumns
+        """
+        from .columns import HocrPropertyColumns
+        return HocrPropertyColumns(self, root, props, context)
+
+    def check_properties(self, report, root, context=None):
         """
         Parse and check all properties.
         """
+        if context is None:
+            context = self.context(root)
         #  print __method__
         #  if self.profile.implicit_capabilities
-        for el in root.xpath('//*[starts-with(@class, "ocr")][@title]'):
+        els = root.xpath('descendant-or-self::*[starts-with(@class, "ocr")][@title]')
+        if context.timings is not None:
+            context.timings.count('elements with properties', len(els))
+        for el in els:
             try:
-                props = self.parse_properties(el.attrib['title'])
+                props = context.properties(el)
             except Exception as e:
-                return report.add('ERROR', el.sourceline,
-                                  'Error parsing properties for "%s" : (property %s)' %
-                                  (self.__elem_name(el), e))
+                report.add('ERROR', el.sourceline,
+                           'Error parsing properties for "%s" : (property %s)',
+                           el, str(e), rule='title_syntax')
+                continue
             for k in props:
-                self.__check_against_prop_spec(report, el, k, props[k])
+                self.__check_against_prop_spec(report, context, el, k, props[k])
 
-    def check_classes(self, report, root):
+    def check_classes(self, report, root, context=None):
         """
         check all elements by their class
-        """
-        for class_spec in [getattr(HocrSpecClasses, k)
-                           for k in dir(HocrSpecClasses)
-                           if k.startswith('ocr')]:
-            els = root.xpath('//*[@class="%s"]' % class_spec.name)
-            if class_spec.must_exist and len(els) == 0:
+
+        The tree is walked once to build a structural index and every
+        element is checked against the specs of all the classes in its
+        (possibly multi-valued) class attribute.
+        """
+        if context is None:
+            context = self.context(root)
+        found = context.found_classes
+        timings = context.timings
+        if self.compile_checks:
+            from .compiler import HocrClassCompiler
+            checkers = HocrClassCompiler.checkers(self)
+            for el, classes in context.index.elements:
+                for class_name in classes:
+                    found.add(class_name)
+                    if timings is None:
+                        checkers[class_name](report, context, el)
+                        continue
+                    t0 = timer()
+                    checkers[class_name](report, context, el)
+                    timings.add('class %s' % class_name, timer() - t0)
+        else:
+            class_specs = self.class_specs
+            for el, classes in context.index.elements:
+                for class_name in classes:
+                    found.add(class_name)
+                    if timings is None:
+                        self.__check_against_ocr_class(
+                            report, context, el, class_specs[class_name])
+                        continue
+                    t0 = timer()
+                    self.__check_against_ocr_class(report, context, el,
+                                                   class_specs[class_name])
+                    timings.add('class %s' % class_name, timer() - t0)
+        if context.partial:
+            return
+        for class_spec in self.must_exist_classes:
+            if not class_spec.name in found:
                 report.add('ERROR', 0,
-                           'At least one %s must exist' % class_spec)
-            for el in els:
-                self.__check_against_ocr_class(report, el, class_spec)
+                           'At least one %s must exist', class_spec,
+                           rule='must_exist')
 
-    def check_attributes(self, report, root):
+    def check_attributes(self, report, root, context=None):
         """
         check attributes according to the spec.
         """
-        for attr_spec in [getattr(HocrSpecAttributes, k)
-                          for k in dir(HocrSpecAttributes)
-                          if k.startswith('attr_')]:
-            els = root.xpath('//*[starts-with(@class, "ocr")][@%s]' %
+        if context is None:
+            context = self.context(root)
+        for attr_spec in self.attribute_specs:
+            els = root.xpath('descendant-or-self::*[starts-with(@class, "ocr")][@%s]' %
                              attr_spec.name)
+            if context.timings is not None:
+                context.timings.count('elements with attribute %s' %
+                                      attr_spec.name, len(els))
             for el in els:
                 if '' == el.attrib[attr_spec.name]:
                     report.add(
                         'ERROR', el.sourceline,
                         "%s: Attribute '%s' is empty. "
-                        "Either use 'unknown' or don't specify the attribute"
-                        % (self.__elem_name(el), attr_spec.name))
+                        "Either use 'unknown' or don't specify the attribute",
+                        el, attr_spec.name, rule='empty_attribute')
                 for cap in attr_spec.required_capabilities:
-                    self.__has_capability(report, el, cap)
+                    self.__has_capability(report, context, el, cap)
+
+    def check_geometry(self, report, root, context=None):
+        """
+        check the bounding boxes of elements: well-formed, within the box of
+        the closest ancestor with one and not overlapping siblings of the
+        same class by more than `overlap_threshold`.
+
+        Optional, enabled with `add_check`. Requires NumPy.
+        """
+        from .geometry import MAX_COORDINATE, HocrBoxes, load_numpy
+        if context is None:
+            context = self.context(root)
+        numpy = load_numpy()
+        if numpy is None:
+            if not context.partial:
+                report.add('DEBUG', 0,
+                           "Geometry not checked, NumPy is not installed",
+                           rule='not_checked')
+            return
+        boxes = HocrBoxes(root, context)
+        if context.timings is not None:
+            context.timings.count('bounding boxes', len(boxes))
+        elements = boxes.elements
+        for el, n in boxes.malformed:
+            report.add('ERROR', el.sourceline,
+                       "%s: bbox must have 4 values, not %d",
+                       el, n, rule='bbox_length')
+        for el, bbox in boxes.out_of_range:
+            report.add('ERROR', el.sourceline,
+                       "%s: bbox %s has coordinates beyond %d",
+                       el, bbox, MAX_COORDINATE, rule='bbox_range')
+        for i in boxes.inverted():
+            el = elements[i]
+            report.add('ERROR', el.sourceline,
+                       "%s: bbox %s is inverted",
+                       el, boxes.boxes[i].tolist(), rule='bbox_inverted')
+        for i in boxes.empty():
+            el = elements[i]
+            report.add('WARN', el.sourceline,
+                       "%s: bbox has zero width or height",
+                       el, rule='bbox_empty')
+        for i in boxes.uncontained():
+            el = elements[i]
+            parent = elements[boxes.parents[i]]
+            report.add('WARN', el.sourceline,
+                       "%s: bbox is not within the bbox of %s in line %d",
+                       el, parent, HocrSourceLine(parent.sourceline),
+                       rule='bbox_containment')
+        for i, j, ratio in zip(*boxes.sibling_overlaps(self.overlap_threshold)):
+            el = elements[i]
+            sibling = elements[j]
+            report.add('WARN', el.sourceline,
+                       "%s: bbox overlaps %d%% of earlier sibling %s in line %d",
+                       el, int(ratio * 100), sibling,
+                       HocrSourceLine(sibling.sourceline),
+                       rule='bbox_overlap')
 
-    def check_metadata(self, report, root):
+    def check_metadata(self, report, root, context=None):
         """
         check metadata tags.
         """
         # Check for unknown fields
         for el in root.xpath("//meta[starts-with(@name, 'ocr')]"):
             name = el.attrib['name']
-            if not getattr(HocrSpecMetadataFields, name.replace('-', '_'), None):
-                report.add('ERROR', el.sourceline, "%s Unknown metadata field '%s'"
-                           % (self.__elem_name(el), name))
-        for field_spec in [getattr(HocrSpecMetadataFields, k)
-                           for k in dir(HocrSpecMetadataFields)
-                           if k.startswith('ocr')]:
+            if not name.replace('-', '_') in self.metadata_fields:
+                report.add('ERROR', el.sourceline, "%s Unknown metadata field '%s'",
+                           el, name, rule='unknown_metadata')
+        for field_spec in self.metadata_specs:
             els = root.xpath("//meta[@name='%s']" % field_spec.name)
             # Cardinality checks
             if len(els) > 1:
                 report.add('ERROR', els[1].sourceline,
-                           "Metadata fields must not be repeated")
+                           "Metadata fields must not be repeated",
+                           rule='repeated_metadata')
             elif len(els) == 0:
                 if field_spec.required:
-                    report.add('ERROR', 0, "Required metadata field '%s' missing" %
-                               field_spec.name)
+                    report.add('ERROR', 0, "Required metadata field '%s' missing",
+                               field_spec.name, rule='required_metadata')
                 elif field_spec.recommended:
-                    report.add('WARN', 0, "Recommended metadata field '%s' missing" %
-                               field_spec.name)
-                return
+                    report.add('WARN', 0, "Recommended metadata field '%s' missing",
+                               field_spec.name, rule='recommended_metadata')
+                continue
             # Field-specific checks
             el = els[0]
             try:
                 content = el.attrib['content']
             except KeyError as e:
                 report.add('ERROR', el.sourceline,
-                           "%s must have 'content' attribute" % self.__elem_name(el))
-                return
+                           "%s must have 'content' attribute", el,
+                           rule='metadata_content')
+                continue
             if HocrSpecMetadataFields.ocr_system == field_spec:
                 if not content in field_spec.known:
                     report.add(
                         'DEBUG', el.sourceline,
                         "Unknown ocr-system: '%s'. "
-                        "Consider opening an issue to let others know about it."
-                        % content)
+                        "Consider opening an issue to let others know about it.",
+                        content, rule='unknown_ocr_system')
             # TODO check other metadata
 
-    def check(self, report, root):
+    def context(self, root, timings=None):
+        """
+        Create the context shared by all checks of one validation run.
+        """
+        from .context import HocrDocumentContext
+        return HocrDocumentContext(self, root, timings=timings)
+
+    def check(self, report, root, context=None):
         """
         Execute all enabled checks
+
+        If the report has `timings`, the time spent in every check is
+        recorded there.
         """
-        for check in self.checks:
-            fn = getattr(HocrSpec, "check_%s"%(check))
-            fn(self, report, root)
+        if context is None:
+            context = self.context(root, timings=report.timings)
+        for check, fn in self.check_functions:
+            if context.timings is None:
+                fn(self, report, root, context)
+            else:
+                context.timings.call('check_%s' % check,
+                                     fn, self, report, root, context)
+            report.checkpoint()
+
+
+# Lookup tables by HocrSpec class, see HocrSpec.__init__
+_tables = {}
+
+
+def _build_spec(cls, profile, kwargs):
+    return cls(profile, **kwargs)
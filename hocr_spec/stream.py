@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+from builtins import object
+
+
+class HocrStreamChecker(object):
+    """
+    Check a document while it is being parsed, page by page.
+
+    Every outermost 'ocr_page' is checked as soon as it is complete and
+    then cleared, so memory is bounded by the largest page rather than by
+    the whole document. Metadata and 'must_exist' are checked once the
+    document is complete. Capabilities are taken from the metadata parsed
+    before the first page, i.e. the <head>.
+
+    Args:
+        spec (HocrSpec): The spec to check against
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.page_checks = tuple((check, fn)
+                                 for check, fn in spec.check_functions
+                                 if check != 'metadata')
+
+    def check(self, report, events):
+        """
+        Execute all enabled checks on a stream of parser events.
+
+        Args:
+            report (HocrValidator.Report): Report to add issues to
+            events (Iterable[Tuple[str,_Element]]): 'start' and 'end'
+                events, e.g. from lxml.etree.iterparse
+        """
+        for _ in self.iter_check(report, events):
+            pass
+
+    def iter_check(self, report, events):
+        """
+        Like `check`, but pause after every page and after the
+        document-level checks, so the caller can take the issues added to
+        `report` so far or stop early.
+
+        Yields:
+            None, once per page and once for the document
+        """
+        context = None
+        open_pages = 0
+        el = None
+        for event, el in events:
+            classes = el.get('class')
+            if not classes or not 'ocr_page' in classes.split():
+                continue
+            if event == 'start':
+                open_pages += 1
+                continue
+            open_pages -= 1
+            if open_pages > 0:
+                continue
+            if context is None:
+                context = self.spec.context(el.getroottree().getroot(),
+                                            timings=report.timings)
+            self.check_page(report, context, el)
+            yield
+        if el is None:
+            return
+        root = el.getroottree().getroot()
+        if context is None:
+            context = self.spec.context(root, timings=report.timings)
+        self.check_document(report, context, root)
+        yield
+
+    def check_document(self, report, context, root):
+        """
+        Document-level checks on what is left after clearing the pages.
+        """
+        self.spec.check(report, root, context.subtree(root, partial=False))
+
+    def check_page(self, report, context, page):
+        """
+        Check the subtree of a single page and clear it.
+
+        Returns:
+            HocrDocumentContext: The context the page was checked with
+        """
+        page_context = self.check_subtree(report, context, page)
+        page.clear()
+        return page_context
+
+    def check_subtree(self, report, context, page):
+        """
+        Check the subtree of a single page and summarize it in
+        `context.detached`, for clearing it afterwards.
+
+        Returns:
+            HocrDocumentContext: The context the page was checked with
+        """
+        page_context = context.subtree(page)
+        for check, fn in self.page_checks:
+            if context.timings is None:
+                fn(self.spec, report, page, page_context)
+            else:
+                context.timings.call('check_%s' % check,
+                                     fn, self.spec, report, page, page_context)
+        if context.timings is not None:
+            context.timings.count('pages')
+        if 'classes' in self.spec.checks:
+            context.detached[page] = page_context.index.detach(page)
+        report.detach()
+        report.checkpoint()
+        return page_context
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+from builtins import object
+
+import time
+
+timer = getattr(time, 'perf_counter', time.time)
+
+
+class HocrTimings(object):
+    """
+    Wall time and number of calls of named sections of a validation run,
+    plus plain counters, e.g. of elements checked.
+    """
+
+    def __init__(self):
+        self.seconds = {}
+        self.calls = {}
+        self.counts = {}
+
+    def add(self, name, seconds, calls=1):
+        """
+        Account `seconds` and `calls` to section `name`.
+        """
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + calls
+
+    def count(self, name, n=1):
+        """
+        Increase counter `name` by `n`.
+        """
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def call(self, name, fn, *args):
+        """
+        Call fn(*args) and account its wall time to section `name`.
+        """
+        t0 = timer()
+        try:
+            return fn(*args)
+        finally:
+            self.add(name, timer() - t0)
+
+    def as_dict(self):
+        return {
+            'seconds': dict(self.seconds),
+            'calls': dict(self.calls),
+            'counts': dict(self.counts),
+        }
+
+    def format(self):
+        """
+        Sections by descending time, then counters.
+        """
+        out = ["%10s %10s  %s" % ('seconds', 'calls', 'section')]
+        for name in sorted(self.seconds, key=lambda k: -self.seconds[k]):
+            out.append("%10.4f %10d  %s" % (self.seconds[name],
+                                             self.calls[name], name))
+        if self.counts:
+            out.append("%21s  %s" % ('count', 'counter'))
+            for name in sorted(self.counts):
+                out.append("%21d  %s" % (self.counts[name], name))
+        return "\n".join(out)
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+
+from builtins import object
+
+import json
+import mmap
+import re
+import sys
+from collections import Counter
+
+try:
+    from html import unescape
+except ImportError:
+    from HTMLParser import HTMLParser
+    unescape = HTMLParser().unescape
+
+from .spec import HocrSpec
+
+HEAD_END = re.compile(br'</head\s*>|<body[\s>]', re.I)
+META = re.compile(br'<meta\b[^>]*>', re.I)
+META_ATTRIBUTE = re.compile(
+    br'''\b(name|content)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))''', re.I)
+# Without a leading \b, which keeps re from skipping ahead to 'class'
+CLASS_ATTRIBUTE = re.compile(br'''class\s*=\s*(?:"([^"]*)"|'([^']*)')''')
+
+
+class HocrTriage(object):
+    """
+    Facts about an hOCR document from scanning its bytes, without parsing
+    it: the 'ocr-*' metadata in the <head>, the number of elements of every
+    'ocr*' class and whether the metadata passes check_metadata.
+
+    The file is memory-mapped and searched with regular expressions, so
+    this is much faster than validation but can be fooled by markup in
+    comments or CDATA sections.
+
+    Args:
+        source (str): A filename, '-' to read from STDIN or a binary file
+            object
+        spec (Optional[HocrSpec]): Spec with the metadata fields to check.
+            Default: 'standard' profile
+        filename (str): Filename to use in the output
+
+    Attributes:
+        metadata (Dict[str,List[str]]): 'content' of the 'ocr-*' <meta>
+            elements by name, None for those without 'content'
+        classes (Counter): Number of elements by 'ocr*' class
+        problems (List[str]): Why the metadata fails check_metadata
+    """
+
+    line_classes = ('ocr_line', 'ocrx_line', 'ocr_caption', 'ocr_header',
+                    'ocr_footer', 'ocr_textfloat')
+
+    def __init__(self, source, spec=None, filename=None):
+        self.filename = filename or getattr(source, 'name', source)
+        if spec is None:
+            spec = HocrSpec('standard')
+        if source == '-':
+            source = getattr(sys.stdin, 'buffer', sys.stdin)
+        if hasattr(source, 'read'):
+            self.__scan(self.__map(source), spec)
+        else:
+            with open(source, 'rb') as f:
+                self.__scan(self.__map(f), spec)
+
+    @staticmethod
+    def __map(f):
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            # Pipes, empty files and file objects without a descriptor
+            return f.read()
+
+    def __scan(self, data, spec):
+        end = HEAD_END.search(data)
+        self.metadata = {}
+        for meta in META.finditer(data, 0, end.start() if end else len(data)):
+            attributes = {}
+            for m in META_ATTRIBUTE.finditer(meta.group(0)):
+                value = m.group(2) if m.group(2) is not None else \
+                    m.group(3) if m.group(3) is not None else m.group(4)
+                attributes[m.group(1).lower().decode('ascii')] = unescape(
+                    value.decode('utf-8', 'replace'))
+            name = attributes.get('name', '')
+            if name.startswith('ocr'):
+                self.metadata.setdefault(name, []).append(
+                    attributes.get('content'))
+        # Class attributes repeat a lot, split every distinct one once
+        values = Counter(a or b for a, b in CLASS_ATTRIBUTE.findall(data))
+        self.classes = Counter()
+        for value, n in values.items():
+            for token in value.decode('utf-8', 'replace').split():
+                if token.startswith('ocr'):
+                    self.classes[token] += n
+        if isinstance(data, mmap.mmap):
+            data.close()
+        self.problems = self.__check_metadata(spec)
+
+    def __check_metadata(self, spec):
+        """
+        Errors check_metadata reports about the metadata found.
+        """
+        if 'metadata' not in spec.checks:
+            return []
+        problems = []
+        for name in sorted(self.metadata):
+            if not name.replace('-', '_') in spec.metadata_fields:
+                problems.append("Unknown metadata field '%s'" % name)
+        for field_spec in spec.metadata_specs:
+            contents = self.metadata.get(field_spec.name, [])
+            if len(contents) > 1:
+                problems.append("Metadata field '%s' must not be repeated" %
+                                field_spec.name)
+            elif not contents:
+                if field_spec.required:
+                    problems.append("Required metadata field '%s' missing" %
+                                    field_spec.name)
+                continue
+            # The first one is checked even if the field is repeated
+            if contents[0] is None:
+                problems.append("Metadata field '%s' must have 'content' "
+                                "attribute" % field_spec.name)
+        return problems
+
+    def __content(self, name):
+        contents = self.metadata.get(name)
+        return contents[0] if contents else None
+
+    @property
+    def system(self):
+        return self.__content('ocr-system')
+
+    @property
+    def capabilities(self):
+        content = self.__content('ocr-capabilities')
+        return content.split() if content is not None else None
+
+    @property
+    def number_of_pages(self):
+        content = self.__content('ocr-number-of-pages')
+        try:
+            return int(content)
+        except (TypeError, ValueError):
+            return None
+
+    @property
+    def pages(self):
+        return self.classes['ocr_page']
+
+    @property
+    def lines(self):
+        return sum(self.classes[name] for name in self.line_classes)
+
+    @property
+    def words(self):
+        return self.classes['ocrx_word']
+
+    def is_go(self):
+        """
+        Whether the required metadata is there, i.e. check_metadata will
+        report no errors.
+        """
+        return not self.problems
+
+    def as_dict(self):
+        return {
+            'filename': self.filename,
+            'go': self.is_go(),
+            'problems': self.problems,
+            'ocr-system': self.system,
+            'ocr-capabilities': self.capabilities,
+            'ocr-number-of-pages': self.number_of_pages,
+            'pages': self.pages,
+            'lines': self.lines,
+            'words': self.words,
+            'classes': dict(self.classes),
+        }
+
+    def format(self, fmt='text'):
+        """
+        Format as 'text' or, for 'jsonl', as one line of JSON.
+        """
+        if fmt == 'jsonl':
+            return json.dumps(self.as_dict(), sort_keys=True)
+        lines = ["%s: %s" % (self.filename, 'go' if self.is_go() else 'no-go')]
+        for problem in self.problems:
+            lines.append("  %s" % problem)
+        lines.append("  ocr-system: %s" % self.system)
+        lines.append("  ocr-capabilities: %s" % (
+            ' '.join(self.capabilities) if self.capabilities is not None
+            else None))
+        lines.append("  ocr-number-of-pages: %s" % self.number_of_pages)
+        lines.append("  pages: %d, lines: %d, words: %d" % (
+            self.pages, self.lines, self.words))
+        return '\n'.join(lines)
@@ -2,9 +2,34 @@
 
 from builtins import object
 
+import importlib
+import io
+import json
 import sys
-from lxml import etree
 from .spec import HocrSpec
+from .sources import HocrArchiveMember
+from .stream import HocrStreamChecker
+from .timings import HocrTimings, timer
+
+
+class _LazyModule(object):
+    """
+    Stand-in for a module that is imported on first use and then replaces
+    the stand-in in the globals of this module, so reports can be read
+    from the cache and formatted without importing lxml.
+    """
+
+    def __init__(self, name, alias):
+        self.__name = name
+        self.__alias = alias
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__name)
+        globals()[self.__alias] = module
+        return getattr(module, attr)
+
+
+etree = _LazyModule('lxml.etree', 'etree')
 
 
 class HocrValidator(object):
@@ -16,49 +41,341 @@ class HocrValidator(object):
         ERROR = '1'
         FATAL = '1;1'
 
+    class ElementSnapshot(object):
+        """
+        Tag and attributes of an element, to render it in a message after
+        its tree has been freed.
+        """
+        __slots__ = ('tag', 'attrib')
+
+        def __init__(self, el):
+            self.tag = el.tag
+            self.attrib = el.items()
+
+        def get(self, key):
+            for k, v in self.attrib:
+                if k == key:
+                    return v
+
     class ReportItem(object):
         """
         A single report item
+
+        The message is only rendered when needed, from the `message` template
+        and the raw `args`. Elements in `args` are rendered with their tag
+        and attributes.
+
+        Args:
+            level (str): One of LevelAnsiColor
+            sourceline (int): Line of the issue, 0 for the whole document
+            message (str): Message or message template if `args` are given
+            rule (Optional[str]): Identifier of the rule that was violated
         """
-        def __init__(self, level, sourceline, message, **kwargs):
+        __slots__ = ('level', 'sourceline', 'rule', 'template', 'args')
+
+        def __init__(self, level, sourceline, message, *args, **kwargs):
             assert getattr(HocrValidator.LevelAnsiColor, level) != None
             self.level = level
             self.sourceline = sourceline
-            self.message = message
+            self.rule = kwargs.get('rule')
+            self.template = message
+            self.args = args
+
+        @staticmethod
+        def elem_name(el):
+            """
+            Stringify an element with its attributes
+            """
+            attrib = " ".join(['%s="%s"' % (k, v) for k, v in el.attrib])
+            return "<%s %s>" % (el.tag, attrib)
+
+        @property
+        def message(self):
+            if not self.args:
+                return self.template
+            args = []
+            for arg in self.args:
+                if isinstance(arg, etree._Element):
+                    arg = HocrValidator.ElementSnapshot(arg)
+                if isinstance(arg, HocrValidator.ElementSnapshot):
+                    arg = self.elem_name(arg)
+                args.append(arg)
+            return self.template % tuple(args)
+
+        def detach(self):
+            """
+            Replace elements in the arguments with snapshots.
+            """
+            if any(isinstance(arg, etree._Element) for arg in self.args):
+                self.args = tuple(HocrValidator.ElementSnapshot(arg)
+                                  if isinstance(arg, etree._Element) else arg
+                                  for arg in self.args)
+
+        def as_dict(self):
+            return {
+                'level': self.level,
+                'sourceline': self.sourceline,
+                'rule': self.rule,
+                'message': self.message,
+            }
 
         def __str__(self):
             return "[%s] +%s : %s" % (self.level, self.sourceline, self.message)
 
+    class ReportGroup(ReportItem):
+        """
+        All occurrences of one kind of issue in an aggregated report, with
+        the first one as item.
+
+        Occurrences are of the same kind if they have the same level, rule,
+        message template and arguments, except for numbers and with elements
+        compared by tag and class only, see `key`.
+
+        Attributes:
+            count (int): Number of occurrences
+            sourcelines (List[int]): Lines of the first occurrences, at most
+                as many as the report keeps samples
+            min_sourceline (int): Smallest line of any occurrence
+            max_sourceline (int): Largest line of any occurrence
+        """
+        __slots__ = ('count', 'sourcelines', 'min_sourceline',
+                     'max_sourceline')
+
+        def __init__(self, level, sourceline, message, *args, **kwargs):
+            HocrValidator.ReportItem.__init__(self, level, sourceline,
+                                              message, *args, **kwargs)
+            sourceline = sourceline or 0
+            self.count = 1
+            self.sourcelines = [sourceline]
+            self.min_sourceline = self.max_sourceline = sourceline
+
+        @staticmethod
+        def key(level, template, args, rule):
+            """
+            What all occurrences of a kind of issue have in common.
+            """
+            subject = []
+            for arg in args:
+                if isinstance(arg, (etree._Element,
+                                    HocrValidator.ElementSnapshot)):
+                    arg = (arg.tag, arg.get('class'))
+                elif isinstance(arg, (int, float)):
+                    # Values and lines, including HocrSourceLine
+                    continue
+                elif not isinstance(arg, str):
+                    # Spec objects may be copies from other processes
+                    arg = repr(arg)
+                subject.append(arg)
+            return (level, rule, template, tuple(subject))
+
+        def occur(self, sourceline, samples):
+            """
+            Count another occurrence in line `sourceline`.
+            """
+            sourceline = sourceline or 0
+            self.count += 1
+            if len(self.sourcelines) < samples:
+                self.sourcelines.append(sourceline)
+            if sourceline < self.min_sourceline:
+                self.min_sourceline = sourceline
+            if sourceline > self.max_sourceline:
+                self.max_sourceline = sourceline
+
+        def as_dict(self):
+            d = HocrValidator.ReportItem.as_dict(self)
+            d.update({
+                'count': self.count,
+                'sourcelines': self.sourcelines,
+                'min_sourceline': self.min_sourceline,
+                'max_sourceline': self.max_sourceline,
+            })
+            return d
+
+        @staticmethod
+        def from_dict(d):
+            group = HocrValidator.ReportGroup(
+                d['level'], d['sourceline'], d['message'], rule=d['rule'])
+            group.count = d['count']
+            group.sourcelines = d['sourcelines']
+            group.min_sourceline = d['min_sourceline']
+            group.max_sourceline = d['max_sourceline']
+            return group
+
+        def merge(self, group, samples):
+            """
+            Count the occurrences of another group of the same kind.
+            """
+            self.count += group.count
+            self.sourcelines.extend(
+                group.sourcelines[:samples - len(self.sourcelines)])
+            self.min_sourceline = min(self.min_sourceline,
+                                      group.min_sourceline)
+            self.max_sourceline = max(self.max_sourceline,
+                                      group.max_sourceline)
+
+    class StopValidation(Exception):
+        """
+        Raised by Report when its error budget or time is used up.
+        """
+
     class Report(object):
 
         """
         A validation Report
+
+        Args:
+            filename (str): Filename to use in the report
+            timings (Optional[HocrTimings]): Where to record timings of the
+                validation, if at all
+            max_errors (Optional[int]): Stop validation at this many ERROR
+                items
+            timeout (Optional[float]): Stop validation after this many
+                seconds, checked between pages and checks
+            aggregate (Optional[int]): Group the issues by kind into
+                ReportGroup items, keeping the lines of this many
+                occurrences per group
+
+        Attributes:
+            abort (bool): Whether validation was stopped early
         """
-        def __init__(self, filename):
+        def __init__(self, filename, timings=None, max_errors=None,
+                     timeout=None, aggregate=None):
             self.filename = filename
             self.items = []
+            self.aggregate = aggregate
+            self.groups = {} if aggregate is not None else None
             self.abort = False
-
-        def __escape_xml(self, s):
-            translation = {
-                "'": '&apos;',
-                '"': '&quot;',
-                '<': '&lt;',
-                '>': '&gt;',
-                '&': '&amp;',
-            }
-            for k in translation:
-                s = s.replace(k, translation[k])
-            return s
+            self.timings = timings
+            self.max_errors = max_errors
+            self.timeout = timeout
+            self.deadline = timer() + timeout if timeout is not None else None
+            self.errors = 0
+            self.__detached = 0
 
         def add(self, level, *args, **kwargs):
-            self.items.append(HocrValidator.ReportItem(level, *args, **kwargs))
+            if self.groups is None:
+                item = HocrValidator.ReportItem(level, *args, **kwargs)
+                self.items.append(item)
+            else:
+                item = self.__group(level, args[0], args[1], args[2:],
+                                    kwargs.get('rule'))
             if level == 'FATAL':
-                raise ValueError("Validation hit a FATAL issue: %s" % self.items[-1])
+                raise ValueError("Validation hit a FATAL issue: %s" % item)
+            if level == 'ERROR' and self.max_errors is not None:
+                self.__count_errors(1)
+            if self.deadline is not None:
+                self.checkpoint()
+
+        def __count_errors(self, n):
+            self.errors += n
+            if self.errors >= self.max_errors:
+                self.stop('WARN', "Validation stopped after %d errors",
+                          self.errors, rule='max_errors')
+
+        def checkpoint(self):
+            """
+            Stop validation if the time is up.
+            """
+            if self.deadline is not None and timer() > self.deadline:
+                self.stop('ERROR', "Validation timed out after %g seconds",
+                          self.timeout, rule='timeout')
+
+        def stop(self, level, *args, **kwargs):
+            """
+            Add an item saying why validation stops and raise StopValidation.
+            """
+            self.abort = True
+            self.max_errors = self.deadline = None
+            self.items.append(HocrValidator.ReportItem(level, 0, *args, **kwargs))
+            raise HocrValidator.StopValidation(self.items[-1].message)
+
+        def __group(self, level, sourceline, template, args, rule):
+            key = HocrValidator.ReportGroup.key(level, template, args, rule)
+            group = self.groups.get(key)
+            if group is None:
+                group = HocrValidator.ReportGroup(level, sourceline, template,
+                                                  *args, rule=rule)
+                self.groups[key] = group
+                self.items.append(group)
+            else:
+                group.occur(sourceline, self.aggregate)
+            return group
+
+        def extend(self, items):
+            """
+            Add items from another report, e.g. of a single page, within the
+            error budget and time of this report.
+            """
+            if self.groups is None and self.max_errors is None:
+                self.items.extend(items)
+            else:
+                for item in items:
+                    self.__extend(item)
+            self.checkpoint()
+
+        def __extend(self, item):
+            if self.groups is None:
+                self.items.append(item)
+            elif not isinstance(item, HocrValidator.ReportGroup):
+                self.__group(item.level, item.sourceline, item.template,
+                             item.args, item.rule)
+            else:
+                key = HocrValidator.ReportGroup.key(
+                    item.level, item.template, item.args, item.rule)
+                group = self.groups.get(key)
+                if group is None:
+                    self.groups[key] = item
+                    self.items.append(item)
+                else:
+                    group.merge(item, self.aggregate)
+            if item.level == 'ERROR' and self.max_errors is not None:
+                self.__count_errors(getattr(item, 'count', 1))
+
+        def detach(self):
+            """
+            Detach the items added since the last call from the elements they
+            refer to, so the document can be freed.
+            """
+            for item in self.items[self.__detached:]:
+                item.detach()
+            self.__detached = len(self.items)
+
+        def finish(self):
+            """
+            End validation: detach all items and lift the error budget and
+            timeout, so items added afterwards, e.g. by writers, never stop.
+            """
+            self.detach()
+            self.max_errors = self.deadline = None
 
         def is_valid(self):
             return 0 == len([x for x in self.items if x.level in ['ERROR', 'FATAL']])
 
+        def as_dict(self):
+            """
+            The report as a dict of plain values, e.g. to send it as JSON.
+            """
+            return {
+                'filename': self.filename,
+                'valid': self.is_valid(),
+                'items': [item.as_dict() for item in self.items],
+            }
+
+        @staticmethod
+        def from_dict(d):
+            """
+            Restore a report from the result of `as_dict`.
+            """
+            report = HocrValidator.Report(d['filename'])
+            for item in d['items']:
+                if 'count' in item:
+                    report.items.append(HocrValidator.ReportGroup.from_dict(item))
+                    continue
+                report.items.append(HocrValidator.ReportItem(
+                    item['level'], item['sourceline'], item['message'],
+                    rule=item['rule']))
+            return report
+
         def format(self, *args):
             """
             Format the report
@@ -66,62 +383,392 @@ class HocrValidator(object):
             format = args[0] if args[0] else 'text'
             if format == 'bool':
                 return self.is_valid()
-            elif format in ['text', 'ansi']:
-                if self.is_valid():
-                    self.add('OK', 0, "Document is valid")
-                out = []
-                for item in self.items:
-                    filename = self.filename
-                    if item.sourceline > 0:
-                        filename += ':%d' % (item.sourceline)
-                    level = item.level
-                    if format == 'ansi':
-                        level = "\033[3%sm%s\033[0m" % (
-                            getattr(HocrValidator.LevelAnsiColor, item.level),
-                            item.level)
-                    out.append("[%s] %s %s" % (level, filename, item.message))
-                return "\n".join(out)
-            elif format == 'xml':
-                out = []
-                for item in self.items:
-                    out.append(
-                            '\t<item>\n'
-                            '\t\t<level>%s</level>\n'
-                            '\t\t<sourceline>%s</sourceline>\n'
-                            '\t\t<message>%s</message>\n'
-                            '\t</item>' % (item.level, item.sourceline,
-                                           self.__escape_xml(item.message)))
-                return '<report filename="%s" valid="%s">\n%s\n</report>' % (
-                        self.filename,
-                        ('true' if self.is_valid() else 'false'),
-                        "\n".join(out))
-            else:
-                raise ValueError("Unknown format '%s'")
+            out = io.StringIO()
+            writer = HocrValidator.writer(format, out)
+            writer.begin()
+            writer.write(self)
+            writer.end()
+            return out.getvalue().rstrip('\n')
+
+        def write(self, fp, format='text'):
+            """
+            Write the report to the file object `fp`, item by item.
+            """
+            writer = HocrValidator.writer(format, fp)
+            writer.begin()
+            writer.write(self)
+            writer.end()
+
+    class ReportWriter(object):
+        """
+        Writes reports to a file object incrementally.
+
+        Call `begin` once, `write` for every report and `end` once.
+
+        Args:
+            fp (file): File object to write to
+        """
+        def __init__(self, fp):
+            self.fp = fp
+
+        def begin(self):
+            pass
+
+        def write(self, report):
+            raise NotImplementedError()
+
+        def end(self):
+            pass
+
+    class TextWriter(ReportWriter):
+        """
+        One line per item, optionally with ANSI colored levels.
+        """
+        def __init__(self, fp, ansi=False):
+            super(HocrValidator.TextWriter, self).__init__(fp)
+            self.ansi = ansi
+
+        def write(self, report):
+            if report.is_valid():
+                report.add('OK', 0, "Document is valid")
+            for item in report.items:
+                filename = report.filename
+                if item.sourceline > 0:
+                    filename += ':%d' % (item.sourceline)
+                level = item.level
+                if self.ansi:
+                    level = "\033[3%sm%s\033[0m" % (
+                        getattr(HocrValidator.LevelAnsiColor, item.level),
+                        item.level)
+                message = item.message
+                if getattr(item, 'count', 1) > 1:
+                    message += " (%d times in lines %d-%d, e.g. %s)" % (
+                        item.count, item.min_sourceline, item.max_sourceline,
+                        ', '.join(str(line) for line in item.sourcelines))
+                self.fp.write("[%s] %s %s\n" % (level, filename, message))
+
+    class XmlWriter(ReportWriter):
+        """
+        One <report> element per report.
+        """
+        def write(self, report):
+            from xml.sax.saxutils import escape, quoteattr
+            fp = self.fp
+            fp.write('<report filename=%s valid="%s">\n' % (
+                quoteattr(report.filename),
+                ('true' if report.is_valid() else 'false')))
+            for item in report.items:
+                fp.write('\t<item>\n'
+                         '\t\t<level>%s</level>\n'
+                         '\t\t<sourceline>%s</sourceline>\n'
+                         '\t\t<message>%s</message>\n' % (
+                             item.level, item.sourceline,
+                             escape(item.message, {'"': '&quot;', "'": '&apos;'})))
+                if isinstance(item, HocrValidator.ReportGroup):
+                    fp.write('\t\t<count>%d</count>\n'
+                             '\t\t<sourcelines>%s</sourcelines>\n'
+                             '\t\t<min_sourceline>%d</min_sourceline>\n'
+                             '\t\t<max_sourceline>%d</max_sourceline>\n' % (
+                                 item.count,
+                                 ' '.join(str(line) for line in item.sourcelines),
+                                 item.min_sourceline, item.max_sourceline))
+                fp.write('\t</item>\n')
+            fp.write('</report>\n')
+
+    class JsonlWriter(ReportWriter):
+        """
+        One JSON object per item and line.
+        """
+        def write(self, report):
+            for item in report.items:
+                self.write_item(report.filename, item)
+
+        def write_item(self, filename, item):
+            """
+            Write a single item of the report of `filename`.
+            """
+            d = {'filename': filename}
+            d.update(item.as_dict())
+            self.fp.write(json.dumps(d) + '\n')
+
+    class SarifWriter(ReportWriter):
+        """
+        A SARIF 2.1.0 log with one run, all reports written to it are results
+        of that run.
+        """
+        levels = {
+            'FATAL': 'error',
+            'ERROR': 'error',
+            'WARN': 'warning',
+            'DEBUG': 'note',
+            'OK': 'none',
+        }
+
+        def begin(self):
+            self.results = 0
+            tool = {'driver': {
+                'name': 'hocr-spec',
+                'informationUri': 'https://github.com/kba/hocr-spec-python'}}
+            self.fp.write('{"$schema": "https://json.schemastore.org/sarif-2.1.0.json", '
+                          '"version": "2.1.0", "runs": [{"tool": %s, "results": [\n'
+                          % json.dumps(tool))
+
+        def write(self, report):
+            for item in report.items:
+                location = {'artifactLocation': {'uri': report.filename}}
+                if item.sourceline:
+                    location['region'] = {'startLine': item.sourceline}
+                result = {
+                    'level': self.levels[item.level],
+                    'message': {'text': item.message},
+                    'locations': [{'physicalLocation': location}],
+                }
+                if isinstance(item, HocrValidator.ReportGroup):
+                    result['occurrenceCount'] = item.count
+                    result['locations'] = [{'physicalLocation': {
+                        'artifactLocation': location['artifactLocation'],
+                        'region': {'startLine': line}}}
+                        for line in item.sourcelines if line] or \
+                        result['locations']
+                    result['properties'] = {
+                        'minSourceline': item.min_sourceline,
+                        'maxSourceline': item.max_sourceline}
+                if item.rule:
+                    result['ruleId'] = item.rule
+                self.fp.write((',\n' if self.results else '') + json.dumps(result))
+                self.results += 1
 
-    formats = ['text', 'bool', 'ansi', 'xml']
+        def end(self):
+            self.fp.write('\n]}]}\n')
 
-    def __init__(self, profile, **kwargs):
+    @staticmethod
+    def writer(format, fp):
+        """
+        Create a ReportWriter for `format` writing to `fp`.
+        """
+        if format in ['text', 'ansi']:
+            return HocrValidator.TextWriter(fp, ansi=format == 'ansi')
+        elif format == 'xml':
+            return HocrValidator.XmlWriter(fp)
+        elif format == 'jsonl':
+            return HocrValidator.JsonlWriter(fp)
+        elif format == 'sarif':
+            return HocrValidator.SarifWriter(fp)
+        else:
+            raise ValueError("Unknown format '%s'" % format)
+
+    formats = ['text', 'bool', 'ansi', 'xml', 'jsonl', 'sarif']
+
+    def __init__(self, profile, cache=None, **kwargs):
+        """
+        Args:
+            profile (str): Validation profile
+            cache (Optional[HocrResultCache]): Where to look up and store
+                reports of files that were validated before
+            **kwargs: Passed on to HocrSpec
+        """
         self.spec = HocrSpec(profile, **kwargs)
+        self.cache = cache
 
-    def validate(self, source, parse_strict=False, filename=None):
+    def validate(self, source, parse_strict=False, filename=None,
+                 streaming=False, timings=False, incremental=None,
+                 jobs=None, max_errors=None, timeout=None, aggregate=None):
         """
         Validate a hocr document
 
         Args:
-            source (str): A filename or '-' to read from STDIN
+            source (str): A filename, '-' to read from STDIN, a binary
+                          file object or a HocrArchiveMember
             parse_strict (bool): Whether to be strict about broken HTML. Default: False
             filename (str): Filename to use in the reports. Set this if reading
                             from STDIN for nicer output
+            streaming (bool): Whether to check the document page by page
+                              while parsing it instead of parsing it into
+                              memory first. Default: False
+            timings (bool): Whether to record timings of the checks in
+                            `report.timings`. Default: False
+            incremental (Optional[HocrPageCache]): Check only the pages
+                            that changed since the last validation with
+                            this cache and take the reports of the others
+                            from it. Implies `streaming`
+            jobs (Optional[int]): Split the document at its pages and
+                            check them in this many processes, 0 for the
+                            number of CPUs. Only for filenames, implies
+                            `streaming`
+            max_errors (Optional[int]): Stop validation at this many ERROR
+                            items. Implies `streaming`
+            timeout (Optional[float]): Stop validation after this many
+                            seconds and report an ERROR. Checked between
+                            pages and checks. Implies `streaming`
+            aggregate (Optional[int]): Report every kind of issue once, as
+                            ReportGroup with the number of occurrences and
+                            the lines of the first `aggregate` of them
 
+        Reports of validations stopped early have `abort` set and are not
+        stored in the cache.
+
+        This method is thread-safe: every call has its own report and
+        document state, so one validator can serve several threads.
         """
-        parser = etree.HTMLParser(recover=parse_strict)
+        if isinstance(source, HocrArchiveMember):
+            # Not cached, the cache identifies documents by their path
+            with source.open() as f:
+                return self.validate(f, parse_strict, filename or str(source),
+                                     streaming, timings, incremental, None,
+                                     max_errors, timeout, aggregate)
         if not filename: filename = source
+        if incremental is not None:
+            if aggregate is not None:
+                raise ValueError("Incremental validation can't be aggregated")
+            streaming = True
+        limited = max_errors is not None or timeout is not None
+        if limited: streaming = True
+        if jobs is not None and jobs != 1:
+            if incremental is not None:
+                raise ValueError("Incremental validation can't be sharded")
+            if limited:
+                raise ValueError("Validation with max_errors or timeout "
+                                 "can't be sharded")
+            if isinstance(source, str) and source != '-': streaming = True
+            else: jobs = None
+        report = HocrValidator.Report(filename,
+                                      HocrTimings() if timings else None,
+                                      max_errors=max_errors, timeout=timeout,
+                                      aggregate=aggregate)
+        if self.cache is not None and source != '-' \
+                and not hasattr(source, 'read'):
+            t0 = timer()
+            key = self.cache.key(source, self.spec, parse_strict, streaming,
+                                 aggregate)
+            hit = self.cache.get(key, report)
+            if report.timings is not None:
+                report.timings.add('cache', timer() - t0)
+                report.timings.count('cache hits' if hit else 'cache misses')
+            if hit:
+                report.finish()
+                return report
+            self.__validate(source, parse_strict, streaming, report,
+                            incremental, jobs)
+            if not report.abort:
+                self.cache.put(key, report)
+            return report
+        if source == '-': source = sys.stdin
+        return self.__validate(source, parse_strict, streaming, report,
+                               incremental, jobs)
+
+    def iter_issues(self, source, parse_strict=False, max_errors=None,
+                    timeout=None):
+        """
+        Validate a hocr document page by page and yield its issues as they
+        are found.
+
+        Validation goes only as far as the issues are consumed, so stop
+        iterating to stop validating, e.g. at the first ERROR to tell
+        whether a document is valid. The issues of a page are yielded once
+        the page is checked, those of the metadata and 'must_exist' at the
+        end.
+
+        Args:
+            source (str): A filename, '-' to read from STDIN or a binary
+                          file object
+            parse_strict (bool): Whether to be strict about broken HTML. Default: False
+            max_errors (Optional[int]): Stop at this many ERROR items
+            timeout (Optional[float]): Stop after this many seconds
+
+        Yields:
+            HocrValidator.ReportItem: Issues, detached from the document.
+            If validation is stopped by `max_errors` or `timeout`, the last
+            one says so
+        """
+        report = HocrValidator.Report(None, max_errors=max_errors,
+                                      timeout=timeout)
         if source == '-': source = sys.stdin
+        # iterparse needs a binary stream
+        source = getattr(source, 'buffer', source)
+        events = etree.iterparse(source, events=('start', 'end'), html=True,
+                                 recover=parse_strict)
+        start = 0
+        try:
+            for _ in HocrStreamChecker(self.spec).iter_check(report, events):
+                for item in report.items[start:]:
+                    yield item
+                start = len(report.items)
+        except HocrValidator.StopValidation:
+            pass
+        except ValueError as e:
+            sys.stderr.write("Validation errored\n")
+        report.finish()
+        for item in report.items[start:]:
+            yield item
+
+    def validate_many(self, sources, threads=None, **kwargs):
+        """
+        Validate hocr documents in a pool of threads.
+
+        lxml releases the GIL while parsing, so documents are parsed in
+        parallel while others are checked.
+
+        Args:
+            sources (Iterable[str]): Filenames or binary file objects
+            threads (Optional[int]): Number of threads. Default: Chosen by
+                concurrent.futures.ThreadPoolExecutor
+            **kwargs: Passed on to validate
+
+        Returns:
+            Iterator over the reports, in the order of `sources`
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for report in executor.map(
+                    lambda source: self.validate(source, **kwargs), sources):
+                yield report
+
+    def __validate(self, source, parse_strict, streaming, report,
+                   incremental=None, jobs=None):
+        if jobs is not None and jobs != 1:
+            from .shard import HocrShardedValidation
+            try:
+                sharded = HocrShardedValidation(self.spec, jobs or None)
+                if sharded.validate(source, report, parse_strict):
+                    report.finish()
+                    return report
+            except ValueError as e:
+                sys.stderr.write("Validation errored\n")
+                report.finish()
+                return report
+        if streaming:
+            if incremental is None:
+                checker = HocrStreamChecker(self.spec)
+            else:
+                from .incremental import HocrIncrementalChecker
+                checker = HocrIncrementalChecker(self.spec, incremental)
+            return self.__validate_streaming(source, parse_strict, report,
+                                             checker)
+        parser = etree.HTMLParser(recover=parse_strict)
+        t0 = timer()
         doc = etree.parse(source, parser)
+        if report.timings is not None:
+            report.timings.add('parse', timer() - t0)
         root = doc.getroot()
-        report = HocrValidator.Report(filename)
         try:
             self.spec.check(report, root)
+        except HocrValidator.StopValidation:
+            pass
+        except ValueError as e:
+            sys.stderr.write("Validation errored\n")
+        report.finish()
+        return report
+
+    def __validate_streaming(self, source, parse_strict, report, checker):
+        # iterparse needs a binary stream
+        source = getattr(source, 'buffer', source)
+        events = etree.iterparse(source, events=('start', 'end'), html=True,
+                                 recover=parse_strict)
+        try:
+            checker.check(report, events)
+        except HocrValidator.StopValidation:
+            pass
         except ValueError as e:
             sys.stderr.write("Validation errored\n")
+        report.finish()
         return report